@@ -0,0 +1,222 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import networkx as nx
+
+from apigraph.types import EdgeKey, LinkDetail, NodeKey
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class CSR(NamedTuple):
+    """
+    Compressed sparse rows: the neighbours of node `i` are
+    `indices[indptr[i]:indptr[i + 1]]`, via the edges `edges[...]` (same slice)
+    """
+
+    indptr: "np.ndarray"
+    indices: "np.ndarray"  # node ids
+    edges: "np.ndarray"  # edge ids
+
+
+def _csr(rows: "np.ndarray", cols: "np.ndarray", edges: "np.ndarray", size: int) -> CSR:
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return CSR(indptr=indptr, indices=cols[order], edges=edges[order])
+
+
+def _neighbours(csr: CSR, nodes: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Returns:
+        (<neighbour node ids>, <edge ids>) of all `nodes`
+    """
+    starts = csr.indptr[nodes]
+    counts = csr.indptr[nodes + 1] - starts
+    # (offset of each neighbour in `indices`, without a python loop)
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(
+        counts.sum()
+    )
+    return csr.indices[positions], csr.edges[positions]
+
+
+class CompactGraph:
+    """
+    Read-only copy of an `APIGraph.graph`, with nodes interned as ints and
+    the edges of each chainId held as numpy CSR arrays (in both directions),
+    for fast queries over large graphs with a fraction of the memory.
+
+    Edge keys and details are kept in side tables, indexed by edge id.
+
+    Queries take `chain_ids` to follow edges of only those chains, or all
+    edges if `None` (NOTE: the anonymous chain is `None` in `chain_ids`).
+
+    Requires numpy (i.e. the `speedups` extra).
+    """
+
+    nodes: Tuple[NodeKey, ...]  # by node id
+    node_ids: Dict[NodeKey, int]
+    edge_keys: Tuple[EdgeKey, ...]  # by edge id
+    edge_details: Tuple[LinkDetail, ...]  # by edge id
+    edge_nodes: "np.ndarray"  # [[<from node id>, <to node id>], ...] by edge id
+    _successors: Dict[Optional[str], CSR]  # {<chainId>: <CSR>}
+    _predecessors: Dict[Optional[str], CSR]  # {<chainId>: <CSR>}
+
+    def __init__(self, graph: nx.MultiDiGraph):
+        if np is None:
+            raise ImportError("CompactGraph requires numpy")
+        self.nodes = tuple(graph)
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+
+        edges = list(graph.edges(keys=True, data="detail"))
+        self.edge_keys = tuple(key for _, _, key, _ in edges)
+        self.edge_details = tuple(detail for _, _, _, detail in edges)
+        self.edge_nodes = np.array(
+            [(self.node_ids[u], self.node_ids[v]) for u, v, _, _ in edges],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+
+        by_chain: Dict[Optional[str], List[int]] = {}
+        for edge_id, key in enumerate(self.edge_keys):
+            by_chain.setdefault(key.chain_id, []).append(edge_id)
+        self._successors = {}
+        self._predecessors = {}
+        for chain_id, edge_ids in by_chain.items():
+            chain_edges = np.array(edge_ids, dtype=np.int32)
+            from_nodes, to_nodes = self.edge_nodes[chain_edges].T
+            size = len(self.nodes)
+            self._successors[chain_id] = _csr(from_nodes, to_nodes, chain_edges, size)
+            self._predecessors[chain_id] = _csr(to_nodes, from_nodes, chain_edges, size)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the CSR arrays (the side tables share the graph's objects)
+        """
+        return self.edge_nodes.nbytes + sum(
+            array.nbytes
+            for csrs in (self._successors, self._predecessors)
+            for csr in csrs.values()
+            for array in csr
+        )
+
+    def _csrs(
+        self, adjacency: Dict[Optional[str], CSR], chain_ids: Optional[Iterable]
+    ) -> List[CSR]:
+        if chain_ids is None:
+            return list(adjacency.values())
+        return [adjacency[key] for key in set(chain_ids) if key in adjacency]
+
+    def _node_ids(self, node_keys: Iterable[NodeKey]) -> "np.ndarray":
+        try:
+            return np.array([self.node_ids[key] for key in node_keys], dtype=np.int32)
+        except KeyError as e:
+            raise nx.NetworkXError(f"The node {e.args[0]} is not in the digraph.")
+
+    def _reachable(self, node_ids: "np.ndarray", csrs: List[CSR]) -> "np.ndarray":
+        """
+        Returns:
+            mask of nodes reachable from `node_ids` (inclusive)
+        """
+        visited = np.zeros(len(self.nodes), dtype=bool)
+        visited[node_ids] = True
+        frontier = node_ids
+        while frontier.size:
+            found = [_neighbours(csr, frontier)[0] for csr in csrs]
+            frontier = np.unique(np.concatenate(found)) if found else frontier[:0]
+            frontier = frontier[~visited[frontier]]
+            visited[frontier] = True
+        return visited
+
+    def ancestors(
+        self, node_key: NodeKey, chain_ids: Optional[Iterable] = None
+    ) -> List[NodeKey]:
+        """
+        As for `nx.ancestors` (i.e. excludes `node_key`)
+        """
+        return self._related(node_key, self._csrs(self._predecessors, chain_ids))
+
+    def descendants(
+        self, node_key: NodeKey, chain_ids: Optional[Iterable] = None
+    ) -> List[NodeKey]:
+        """
+        As for `nx.descendants`
+        """
+        return self._related(node_key, self._csrs(self._successors, chain_ids))
+
+    def _related(self, node_key: NodeKey, csrs: List[CSR]) -> List[NodeKey]:
+        node_ids = self._node_ids([node_key])
+        reachable = self._reachable(node_ids, csrs)
+        reachable[node_ids] = False
+        return [self.nodes[i] for i in np.flatnonzero(reachable)]
+
+    def in_edges(
+        self, node_key: NodeKey, chain_ids: Optional[Iterable] = None
+    ) -> List[Tuple[NodeKey, EdgeKey, LinkDetail]]:
+        """
+        Returns:
+            [(<from node>, <key>, <detail>), ...] of edges into `node_key`
+        """
+        node_ids = self._node_ids([node_key])
+        return [
+            (self.nodes[from_node], self.edge_keys[edge], self.edge_details[edge])
+            for csr in self._csrs(self._predecessors, chain_ids)
+            for from_node, edge in zip(*_neighbours(csr, node_ids))
+        ]
+
+    def topological_generations(
+        self,
+        chain_ids: Optional[Iterable] = None,
+        node_keys: Optional[Iterable[NodeKey]] = None,
+    ) -> List[List[NodeKey]]:
+        """
+        As for `nx.topological_generations`, of the sub-graph of `node_keys`
+        (or the whole graph) and the edges of `chain_ids`.
+
+        Raises:
+            nx.NetworkXUnfeasible: if the sub-graph contains a cycle
+        """
+        csrs = self._csrs(self._successors, chain_ids)
+        if node_keys is None:
+            included = np.ones(len(self.nodes), dtype=bool)
+        else:
+            included = np.zeros(len(self.nodes), dtype=bool)
+            included[self._node_ids(node_keys)] = True
+
+        in_degree = np.zeros(len(self.nodes), dtype=np.int64)
+        for csr in csrs:
+            from_nodes = np.repeat(np.arange(len(self.nodes)), np.diff(csr.indptr))
+            within = included[from_nodes] & included[csr.indices]
+            np.add.at(in_degree, csr.indices[within], 1)
+
+        generations = []
+        generation = np.flatnonzero(included & (in_degree == 0))
+        remaining = int(included.sum())
+        while generation.size:
+            generations.append([self.nodes[i] for i in generation])
+            remaining -= generation.size
+            successors = [_neighbours(csr, generation)[0] for csr in csrs]
+            successors = np.concatenate(successors) if successors else generation[:0]
+            successors = successors[included[successors]]
+            np.subtract.at(in_degree, successors, 1)
+            candidates = np.unique(successors)
+            generation = candidates[in_degree[candidates] == 0]
+        if remaining:
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+        return generations
+
+    def topological_sort(
+        self,
+        chain_ids: Optional[Iterable] = None,
+        node_keys: Optional[Iterable[NodeKey]] = None,
+    ) -> List[NodeKey]:
+        """
+        As for `nx.topological_sort` (see `topological_generations`)
+        """
+        return [
+            node
+            for generation in self.topological_generations(chain_ids, node_keys)
+            for node in generation
+        ]
@@ -24,7 +24,27 @@ class Settings(CoerceEnumSettings):
         env_prefix = "APIGRAPH_"
 
     CACHE_DIR: Optional[str] = ".apigraph"  # uses tmp if None, relative to exec dir
-    CACHE_EXPIRE: Optional[float] = None
+    CACHE_EXPIRE: Optional[float] = None  # (seconds) docs are fresh for this long
+    CACHE_REVALIDATE: bool = True  # conditional GET for stale http(s) docs
+    MODEL_CACHE: bool = True  # also cache the validated OpenAPI3Document models
+    GRAPH_SNAPSHOTS: bool = False  # restore APIGraph from cache if docs unchanged
+
+    CRAWL_CONCURRENCY: int = 10  # max docs in-flight when crawling async
+    CRAWL_MAX_DEPTH: Optional[int] = None  # max links from a start doc, to crawl
+    CRAWL_MAX_DOCUMENTS: Optional[int] = None  # max docs to crawl, in total
+
+    CHAIN_CACHE_SIZE: Optional[int] = 1024  # chain_for_node results cached, None: all
+
+    WATCH_INTERVAL: float = 0.25  # (seconds) between checks for changed files
+    WATCH_DEBOUNCE: float = 0.1  # (seconds) wait for edits to settle before refresh
+
+    VALIDATION_WORKERS: int = 0  # >1 to validate large docs in a process pool
+    VALIDATION_CHUNK_SIZE: int = 250  # paths (or components) per worker task
+
+    HTTP2: bool = False
+    HTTP_TIMEOUT: Optional[float] = 5.0  # seconds, None for no timeout
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
 
     BACKLINKS_ATTR: str = "x-apigraph-backlinks"
     LINK_CHAIN_ID_ATTR: str = "x-apigraph-chainId"
@@ -1,10 +1,31 @@
-from typing import Dict, FrozenSet, Optional, Set, Tuple, Union
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 from urllib.parse import unquote, urlsplit, urlunsplit
 
 import inject
 import networkx as nx
 from jsonspec.pointer import Pointer
 from openapi_orm.models import (
+    In,
     Link,
     OpenAPI3Document,
     Operation,
@@ -13,16 +34,23 @@ from openapi_orm.models import (
     SecurityScheme,
 )
 
-from apigraph.loader import load_doc
+from apigraph.compact import CompactGraph
+from apigraph.loader import RefTable, load_doc, load_doc_async, merkle_root
 from apigraph.types import (
+    NOT_SET,
+    CacheInfo,
+    CrawlStats,
     EdgeKey,
+    ExecutionPlan,
     HttpMethod,
     LinkDetail,
     LinkType,
+    MergedExecutionPlan,
     NodeKey,
     OperationDetail,
     OperationIdPathIndex,
     ParamKey,
+    ParamSource,
 )
 
 
@@ -72,6 +100,369 @@ def _build_operation_id_path_index(doc: OpenAPI3Document) -> OperationIdPathInde
     return index
 
 
+class LRUCache:
+    """
+    Bounded cache which discards the least recently used entry when full
+    (`maxsize=None` for unbounded, `maxsize=0` to disable caching)
+    """
+
+    def __init__(self, maxsize: Optional[int]):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._data),
+        )
+
+
+class LazyDocuments(MutableMapping):
+    """
+    {<doc_uri>: <doc>}
+
+    Docs added via `add_uris` are only loaded (typically from the model
+    cache) when first accessed. Used when restoring a graph from snapshot.
+    """
+
+    _docs: Dict[str, Any]
+    _load_options: Dict[str, Any]  # kwargs for `load_doc`
+
+    def __init__(self, **load_options):
+        self._docs = {}
+        self._load_options = load_options
+
+    def add_uris(self, uris: Iterable[str]):
+        for uri in uris:
+            self._docs.setdefault(uri, NOT_SET)
+
+    def __getitem__(self, uri: str) -> OpenAPI3Document:
+        doc = self._docs[uri]
+        if doc is NOT_SET:
+            doc = self._docs[uri] = load_doc(uri, **self._load_options)
+        return doc
+
+    def __setitem__(self, uri: str, doc: OpenAPI3Document):
+        self._docs[uri] = doc
+
+    def __delitem__(self, uri: str):
+        del self._docs[uri]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._docs)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def copy(self, **load_options) -> "LazyDocuments":
+        """
+        Copy, optionally loading any docs not yet loaded with other
+        `load_options` (by default, the same as this one's)
+        """
+        docs = LazyDocuments(**(load_options or self._load_options))
+        docs._docs = self._docs.copy()
+        return docs
+
+
+EdgeTriple = Tuple[NodeKey, NodeKey, EdgeKey]  # (<from node>, <to node>, <key>)
+
+EdgeSource = Tuple[str, Dict[str, Any]]  # (<doc_uri>, <edge attrs>)
+
+# {<node>: ((<adjacent node>, <key>, <edge attrs>), ...)}
+ChainAdjacency = Dict[NodeKey, Tuple[Tuple[NodeKey, EdgeKey, Dict[str, Any]], ...]]
+
+ChainIndex = Dict[Optional[str], ChainAdjacency]  # {<chainId>: <adjacency>}
+# {<node>: {<param key>: <sources>}}
+ProvenanceIndex = Dict[NodeKey, Dict[ParamKey, Tuple[ParamSource, ...]]]
+
+
+class Closure(NamedTuple):
+    nodes: List[NodeKey]  # by bit index
+    index: Dict[NodeKey, int]  # {<node>: <bit index>}
+    bits: Dict[NodeKey, int]  # {<node>: <reachable nodes bitset>}
+
+
+def _reachable(
+    node_keys: Iterable[NodeKey], adjacency: List[ChainAdjacency]
+) -> Set[NodeKey]:
+    """
+    Nodes reachable from any of `node_keys` (inclusive) via `adjacency`
+    """
+    nodes = set(node_keys)
+    to_visit = list(nodes)
+    while to_visit:
+        node = to_visit.pop()
+        for chain_adjacency in adjacency:
+            for other, _, _ in chain_adjacency.get(node, ()):
+                if other not in nodes:
+                    nodes.add(other)
+                    to_visit.append(other)
+    return nodes
+
+
+def _reachable_sets(
+    node_keys: Iterable[NodeKey], adjacency: List[ChainAdjacency],
+) -> Dict[NodeKey, List[NodeKey]]:
+    """
+    Nodes reachable (inclusive) from each of `node_keys` via `adjacency`,
+    i.e. ancestors via predecessors or descendants via successors.
+    """
+    node_keys = list(node_keys)
+    closure = _closure(node_keys, adjacency)
+
+    reachable: Dict[NodeKey, List[NodeKey]] = {}
+    for node_key in node_keys:
+        # (indexes of set bits, via the reversed binary string)
+        binary = bin(closure.bits[node_key])[:1:-1]
+        reachable[node_key] = []
+        position = binary.find("1")
+        while position != -1:
+            reachable[node_key].append(closure.nodes[position])
+            position = binary.find("1", position + 1)
+    return reachable
+
+
+def _closure(node_keys: Iterable[NodeKey], adjacency: List[ChainAdjacency]) -> Closure:
+    """
+    Transitive closure (via `adjacency`) of `node_keys` and all nodes reachable
+    from them.
+
+    Uses Tarjan's algorithm to find the strongly connected components, which
+    are completed only after all of the components they can reach. So the
+    reachable set of each component is the union of those of its adjacent
+    nodes, held as bitsets so that each union is one `|`.
+    """
+
+    def _adjacent(node: NodeKey) -> List[NodeKey]:
+        return [
+            other
+            for chain_adjacency in adjacency
+            for other, _, _ in chain_adjacency.get(node, ())
+        ]
+
+    nodes: List[NodeKey] = []  # in visit order, i.e. by bit index
+    index: Dict[NodeKey, int] = {}
+    lowlink: Dict[NodeKey, int] = {}
+    stack: List[NodeKey] = []  # nodes of unfinished components
+    on_stack: Set[NodeKey] = set()
+    bits: Dict[NodeKey, int] = {}  # {<node>: <reachable nodes bitset>}
+
+    def _visit(node: NodeKey) -> Tuple[NodeKey, Iterator[NodeKey]]:
+        index[node] = lowlink[node] = len(nodes)
+        nodes.append(node)
+        stack.append(node)
+        on_stack.add(node)
+        return node, iter(_adjacent(node))
+
+    for root in node_keys:
+        if root in index:
+            continue
+        to_visit = [_visit(root)]
+        while to_visit:
+            node, adjacent = to_visit[-1]
+            for other in adjacent:
+                if other not in index:
+                    to_visit.append(_visit(other))
+                    break
+                if other in on_stack:
+                    lowlink[node] = min(lowlink[node], index[other])
+            else:
+                to_visit.pop()
+                if to_visit:
+                    parent = to_visit[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    # complete the component rooted at node
+                    members = []
+                    member = None
+                    while member != node:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.append(member)
+                    component_bits = 0
+                    for member in members:
+                        component_bits |= 1 << index[member]
+                        for other in _adjacent(member):
+                            component_bits |= bits.get(other, 0)
+                    for member in members:
+                        bits[member] = component_bits
+
+    return Closure(nodes=nodes, index=index, bits=bits)
+
+
+def _link_params(
+    detail: LinkDetail, operation: Optional[OperationDetail]
+) -> Dict[ParamKey, Any]:
+    """
+    Parameters of `operation` which the link supplies a value for
+
+    Link parameter names may be qualified by location, e.g. `path.id`,
+    otherwise they match the operation's parameters of that name in any
+    location.
+
+    Returns:
+        {<param key>: <expression>}
+    """
+    parameters = operation.parameters if operation is not None else {}
+    supplied = {}
+    for name, expression in detail.parameters.items():
+        location, _, unqualified = name.partition(".")
+        if unqualified and location in {loc.value for loc in In}:
+            supplied[ParamKey(unqualified, In(location))] = expression
+        else:
+            supplied.update(
+                (param_key, expression)
+                for param_key in parameters
+                if param_key.name == name
+            )
+    return supplied
+
+
+def _supplies_missing(
+    detail: LinkDetail,
+    operation: Optional[OperationDetail],
+    satisfied: FrozenSet[ParamKey],
+) -> bool:
+    """
+    Whether the link supplies a value to `operation` which is not `satisfied`
+    """
+    if detail.requestBody is not None or detail.requestBodyParameters:
+        # (body values have no `ParamKey`, so are never satisfied)
+        return True
+    return not _link_params(detail, operation).keys() <= satisfied
+
+
+def _plan_chain(
+    chain_id: Optional[str], chain: nx.MultiDiGraph
+) -> Tuple[
+    Tuple[Tuple[NodeKey, ...], ...],
+    Dict[Tuple[NodeKey, NodeKey], Tuple[EdgeKey, LinkDetail]],
+    List[NodeKey],
+]:
+    """
+    Returns:
+        (<generations>, <links>, <nodes which could not be planned>)
+        (see `ExecutionPlan`, the remaining nodes are in, or depend on, a
+        cycle)
+    """
+    # pick one edge for each pair of nodes: preferring those with `chain_id`
+    # over anonymous, then backlinks over links
+    links: Dict[Tuple[NodeKey, NodeKey], Tuple[EdgeKey, LinkDetail]] = {}
+    ranks: Dict[Tuple[NodeKey, NodeKey], Tuple[bool, bool, str]] = {}
+    for from_node, to_node, key, attrs in chain.edges(keys=True, data=True):
+        pair = (from_node, to_node)
+        detail = attrs["detail"]
+        rank = (
+            key.chain_id != chain_id,
+            detail.link_type is not LinkType.BACKLINK,
+            key.response_id,
+        )
+        if pair not in ranks or rank < ranks[pair]:
+            ranks[pair] = rank
+            links[pair] = (key, detail)
+
+    # group into generations by removing nodes having no (remaining) deps
+    in_degree = {node: 0 for node in chain}
+    successors: Dict[NodeKey, List[NodeKey]] = {}
+    for from_node, to_node in links:
+        if from_node == to_node:
+            continue  # (e.g. pagination, not a dependency)
+        in_degree[to_node] += 1
+        successors.setdefault(from_node, []).append(to_node)
+
+    generations = []
+    generation = sorted(node for node, degree in in_degree.items() if degree == 0)
+    while generation:
+        generations.append(tuple(generation))
+        next_generation = []
+        for node in generation:
+            del in_degree[node]
+            for successor in successors.get(node, ()):
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    next_generation.append(successor)
+        generation = sorted(next_generation)
+
+    return tuple(generations), links, sorted(in_degree)
+
+
+def _find_cycle(
+    start: NodeKey, component: FrozenSet[NodeKey], predecessors: List[ChainAdjacency],
+) -> List[NodeKey]:
+    """
+    Shortest cycle through `start`, within its strongly connected `component`
+    """
+    successor_of: Dict[NodeKey, NodeKey] = {}  # (breadth-first, from `start`)
+    to_visit = deque([start])
+    while to_visit:
+        node = to_visit.popleft()
+        for chain_predecessors in predecessors:
+            for from_node, _, _ in chain_predecessors.get(node, ()):
+                if from_node == start:
+                    if node == start:
+                        continue
+                    cycle = [start]
+                    while node != start:
+                        cycle.append(node)
+                        node = successor_of[node]
+                    return cycle
+                if from_node in component and from_node not in successor_of:
+                    successor_of[from_node] = node
+                    to_visit.append(from_node)
+    raise ValueError(f"{start} is not in a cycle")  # pragma: no cover
+
+
+class ChainCycles(NamedTuple):
+    components: Tuple[FrozenSet[NodeKey], ...]  # strongly connected, size > 1
+    downstream: FrozenSet[NodeKey]  # nodes in, or descended from, a component
+
+
+class GraphSnapshot(NamedTuple):
+    merkle_root: str  # of `doc_hashes`
+    doc_hashes: Dict[str, str]  # {<doc_uri>: <content hash>} for all source docs
+    dependencies: Dict[str, Set[str]]  # {<crawled doc_uri>: <uris it was built from>}
+    nodes: List[Tuple[NodeKey, Dict[str, Any]]]
+    edges: List[Tuple[NodeKey, NodeKey, EdgeKey, Dict[str, Any]]]
+    indexes: Dict[str, OperationIdPathIndex]
+    # (defaults so that snapshots from earlier versions can be loaded, and
+    # then discarded as incomplete)
+    edge_sources: Optional[Dict[EdgeTriple, List[EdgeSource]]] = None
+    links: Optional[Dict[str, FrozenSet[str]]] = None
+    crawl_stats: Optional[Dict[str, CrawlStats]] = None
+    uncrawled_uris: Optional[Set[str]] = None
+
+
 class APIGraph:
     # We are using a multi-graph because it's possible to have multiple
     # links or backlinks between same endpoints i.e. multiple edges
@@ -79,18 +470,294 @@ class APIGraph:
     # In cases where they share a chainId then apigraph will consolidate
     # the redundant edges into one by preferring backlinks over links, and
     # arbitrarily in case of link+link or backlink+backlink redundancy.
+    start_uris: Tuple[str, ...]
+    _load_options: Dict[str, Any]  # kwargs for `load_doc`
     graph: nx.MultiDiGraph
-    docs: Dict[str, OpenAPI3Document]  # {<doc_uri>: <doc>}
+    docs: LazyDocuments  # {<doc_uri>: <doc>}
+    _dependencies: Dict[str, Set[str]]  # {<doc_uri>: <uris it was built from>}
+    _doc_hashes: Dict[str, str]  # {<source doc_uri>: <content hash when loaded>}
+    _links: Dict[str, FrozenSet[str]]  # {<doc_uri>: <uris of docs it links to>}
+    # all the links/backlinks that produced each edge, in the order added
+    # (so that the edge can be re-resolved when a doc is removed)
+    _edge_sources: Dict[EdgeTriple, List[EdgeSource]]
     _indexes: Dict[str, OperationIdPathIndex]  # {<doc_uri>: <index>}
-    _chains: Dict[FrozenSet[str], nx.DiGraph]  # {<matched chainIds>: <sub-graph>}
+    _chains: ChainIndex  # predecessors by chainId (see `_get_chain_index`)
+    _successors: ChainIndex  # successors by chainId
+    _provenance: ProvenanceIndex  # (see `parameter_sources`)
+    _chain_cache: LRUCache  # {(<node_key>, <chain_id>, <traverse_anonymous>): <chain>}
+    _plan_cache: LRUCache  # as for `_chain_cache`, but of `ExecutionPlan`
+    _impact_cache: LRUCache  # as for `_chain_cache`, but of `impact_of_node`
+    _compact: Optional[CompactGraph]  # (see `compact`)
+    _cycles: Dict[FrozenSet[Optional[str]], ChainCycles]  # {<chainIds>: <cycles>}
+    _closures: Dict[FrozenSet[Optional[str]], Closure]  # (see `depends_on`)
+    crawl_stats: Dict[str, CrawlStats]  # {<doc_uri>: <stats>}
+    uncrawled_uris: Set[str]  # docs linked to but not crawled, due to crawl budget
 
-    def __init__(self, start_uri: str):
+    @inject.params(_dc_settings="settings")
+    def __init__(
+        self,
+        start_uri: str,
+        *other_start_uris: str,
+        async_crawl: bool = False,
+        lazy: bool = False,
+        trusted: bool = False,
+        _dc_settings=None,
+    ):
+        """
+        Builds a single graph from all the docs reachable from `start_uri` and
+        `other_start_uris` (together, `start_uris`), each doc is loaded once
+        however many of the start docs refer to it.
+
+        Docs are crawled breadth-first, optionally limited by
+        `Settings.CRAWL_MAX_DEPTH` and `Settings.CRAWL_MAX_DOCUMENTS` (docs over
+        budget are recorded in `uncrawled_uris`). Per-doc timings are recorded
+        in `crawl_stats`.
+
+        If `async_crawl=True` then docs referenced from `start_uris` are fetched
+        concurrently (see `Settings.CRAWL_CONCURRENCY`), in which case which
+        docs fit within `CRAWL_MAX_DOCUMENTS` depends on the order they arrive.
+        NOTE: this starts its own event loop, via `asyncio.run`.
+
+        If `lazy=True` then only the parts of each doc needed to build the
+        graph are validated up front (see `load_doc`).
+
+        If `trusted=True` then docs are not validated at all, only use this
+        for docs which are known to be valid (see `load_doc`).
+
+        If `Settings.GRAPH_SNAPSHOTS` is enabled then the graph is restored
+        from a snapshot when none of its source docs have changed.
+
+        See `refresh` to update the graph after source docs have changed.
+        """
+        start_uris = (start_uri,) + other_start_uris
+        self.start_uris = start_uris
+        self._load_options = {
+            "lazy": lazy,
+            "trusted": trusted,
+            "ref_table": RefTable(),
+        }
         self.graph = nx.MultiDiGraph()
-        self.docs = {}
+        self.docs = LazyDocuments(**self._load_options)
+        self._dependencies = {}
+        self._doc_hashes = {}
+        self._links = {}
+        self._edge_sources = {}
         self._indexes = {}
         self._chains = {}
-        self._build(start_uri)
+        self._successors = {}
+        self._provenance = {}
+        self._chain_cache = LRUCache(_dc_settings.CHAIN_CACHE_SIZE)
+        self._plan_cache = LRUCache(_dc_settings.CHAIN_CACHE_SIZE)
+        self._impact_cache = LRUCache(_dc_settings.CHAIN_CACHE_SIZE)
+        self._compact = None
+        self._cycles = {}
+        self._closures = {}
+        self.crawl_stats = {}
+        self.uncrawled_uris = set()
+        if _dc_settings.GRAPH_SNAPSHOTS and self.load_snapshot():
+            return
+        if async_crawl:
+            asyncio.run(self._build_async(*start_uris))
+        else:
+            self._build(*start_uris)
         self.graph = nx.freeze(self.graph)
+        self._find_cycles()
+        if _dc_settings.GRAPH_SNAPSHOTS:
+            self.save_snapshot()
+
+    @property
+    def start_uri(self) -> str:
+        """
+        The first of `start_uris`
+        """
+        return self.start_uris[0]
+
+    def __enter__(self) -> "APIGraph":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @inject.params(_dc_loader="jsonref_loader")
+    def close(self, _dc_loader=None):
+        """
+        Release the pooled http connections held by the doc loader.
+        """
+        _dc_loader.close()
+
+    @inject.params(_dc_settings="settings")
+    def _snapshot_key(self, _dc_settings=None) -> Tuple[Any, ...]:
+        # (a graph built from unvalidated docs, or within a different crawl
+        # budget, must not be restored for this one)
+        options = {
+            name: value
+            for name, value in self._load_options.items()
+            if name != "ref_table"
+        }
+        options.update(
+            crawl_max_depth=_dc_settings.CRAWL_MAX_DEPTH,
+            crawl_max_documents=_dc_settings.CRAWL_MAX_DOCUMENTS,
+        )
+        return ("snapshot", self.start_uris, tuple(sorted(options.items())))
+
+    @inject.params(_dc_cache="cache", _dc_loader="jsonref_loader")
+    def save_snapshot(self, _dc_cache=None, _dc_loader=None):
+        """
+        Save the built graph to the cache, keyed by `start_uris`, the load
+        options and the crawl budget, recording the content hashes of all the
+        docs it was built from.
+        """
+        doc_hashes = {
+            uri: _dc_loader.content_hash(uri)
+            for uri in set().union(*self._dependencies.values())
+        }
+        snapshot = GraphSnapshot(
+            merkle_root=merkle_root(doc_hashes),
+            doc_hashes=doc_hashes,
+            dependencies=self._dependencies,
+            nodes=list(self.graph.nodes(data=True)),
+            edges=list(self.graph.edges(keys=True, data=True)),
+            indexes=self._indexes,
+            edge_sources=self._edge_sources,
+            links=self._links,
+            crawl_stats=self.crawl_stats,
+            uncrawled_uris=self.uncrawled_uris,
+        )
+        _dc_cache.set(self._snapshot_key(), snapshot)
+
+    @inject.params(_dc_cache="cache", _dc_loader="jsonref_loader")
+    def load_snapshot(self, _dc_cache=None, _dc_loader=None) -> bool:
+        """
+        Restore the graph from a snapshot, if there is one for `start_uris`
+        (built with the same load options and crawl budget) and none of the
+        docs it was built from have changed since.
+        (Docs are then loaded on demand, when accessed via `self.docs`)
+
+        Returns:
+            whether the snapshot was loaded
+        """
+        snapshot = _dc_cache.get(self._snapshot_key())
+        if not isinstance(snapshot, GraphSnapshot) or snapshot.crawl_stats is None:
+            return False
+        doc_hashes = {uri: _dc_loader.content_hash(uri) for uri in snapshot.doc_hashes}
+        if merkle_root(doc_hashes) != snapshot.merkle_root:
+            return False
+
+        graph = nx.MultiDiGraph()
+        graph.add_nodes_from(snapshot.nodes)
+        graph.add_edges_from(snapshot.edges)
+        self.graph = nx.freeze(graph)
+        self.docs = LazyDocuments(**self._load_options)
+        self.docs.add_uris(snapshot.dependencies)
+        self._dependencies = snapshot.dependencies
+        self._doc_hashes = doc_hashes
+        self._links = snapshot.links
+        self._edge_sources = snapshot.edge_sources
+        self._indexes = snapshot.indexes
+        self.crawl_stats = snapshot.crawl_stats
+        self.uncrawled_uris = snapshot.uncrawled_uris
+        self._chains = {}
+        self._successors = {}
+        self._provenance = {}
+        self._chain_cache.clear()
+        self._plan_cache.clear()
+        self._impact_cache.clear()
+        self._compact = None
+        self._closures = {}
+        self._find_cycles()
+        return True
+
+    def refresh(self, *doc_uris: str) -> Set[str]:
+        """
+        Update the graph in-place for changes to its source docs, without
+        rebuilding it from scratch (see `refreshed`).
+
+        If reloading fails the graph is left as it was.
+
+        Returns:
+            the uris of the (crawled) docs which were reloaded
+        """
+        updated, reloaded = self.refreshed(*doc_uris)
+        self.__dict__.update(updated.__dict__)
+        return reloaded
+
+    @inject.params(_dc_settings="settings", _dc_loader="jsonref_loader")
+    def refreshed(
+        self, *doc_uris: str, _dc_settings=None, _dc_loader=None
+    ) -> Tuple["APIGraph", Set[str]]:
+        """
+        Returns a copy of this graph updated for changes to its source docs
+        (or `self`, if nothing changed), this graph is unaffected.
+
+        If `doc_uris` are given then those docs are reloaded, otherwise all the
+        source docs are checked for changes (by content hash, see
+        `DiskCachedJSONOrYAMLRefLoader.revalidate`).
+
+        Only the nodes and edges which came from changed docs, or from docs
+        which include a changed doc via `$ref`, are removed and re-added.
+        Docs newly linked to are crawled, and docs no longer reachable from
+        `start_uris` are dropped.
+
+        Returns:
+            (<updated graph>, <uris of the (crawled) docs which were reloaded>)
+        """
+        if doc_uris:
+            for uri in doc_uris:
+                _dc_loader.revalidate(uri)
+            changed = set(doc_uris)
+        else:
+            changed = {
+                uri
+                for uri, content_hash in self._doc_hashes.items()
+                if _dc_loader.revalidate(uri) != content_hash
+            }
+        stale = {uri for uri, deps in self._dependencies.items() if deps & changed}
+        if not stale:
+            return self, stale
+
+        updated = self._copy()
+        touched: Set[NodeKey] = set()
+        for uri in stale:
+            touched |= updated._remove_doc(uri)
+        updated._crawl(
+            (uri, self.crawl_stats[uri].depth if uri in self.crawl_stats else 0)
+            for uri in stale
+        )
+        touched |= updated._remove_unreachable()
+        updated._prune_nodes(touched)
+        updated._doc_hashes = {
+            uri: content_hash
+            for uri, content_hash in updated._doc_hashes.items()
+            if any(uri in deps for deps in updated._dependencies.values())
+        }
+        updated.crawl_stats = {
+            uri: stats
+            for uri, stats in updated.crawl_stats.items()
+            if uri in updated.docs
+        }
+        updated.graph = nx.freeze(updated.graph)
+        updated._find_cycles()
+        # (closures of chains whose edges are all unchanged still hold)
+        updated._closures = {
+            chain_key: closure
+            for chain_key, closure in self._closures.items()
+            if all(
+                updated._chains.get(chain_id) == self._chains.get(chain_id)
+                for chain_id in chain_key
+            )
+        }
+        if _dc_settings.GRAPH_SNAPSHOTS:
+            updated.save_snapshot()
+        return updated, stale
+
+    def compact(self) -> CompactGraph:
+        """
+        Read-only copy of `graph` in compact (numpy) form, built on first use
+        (requires numpy, i.e. the `speedups` extra)
+        """
+        if self._compact is None:
+            self._compact = CompactGraph(self.graph)
+        return self._compact
 
     def get_operation(self, node_key: NodeKey) -> Operation:
         """
@@ -104,7 +771,7 @@ class APIGraph:
         self, node_key: NodeKey, chain_id: str, traverse_anonymous: bool = True
     ) -> nx.MultiDiGraph:
         """
-        Get a subgraph view containing ancestors of `node_key` which
+        Get a (frozen) subgraph containing ancestors of `node_key` which
         are related via edges having this `chain_id`.
 
         NOTE: Includes the node identified by `node_key` itself.
@@ -115,33 +782,548 @@ class APIGraph:
         it allows to avoid creating redundant links for multiple chains, null chain
         can be used as a default link).
 
+        Results are cached, up to `Settings.CHAIN_CACHE_SIZE` (see
+        `chain_cache_info`), until the graph is refreshed.
+
+        Raises:
+            CircularDependencyError
+        """
+        cache_key = (node_key, chain_id, traverse_anonymous)
+        chain = self._chain_cache.get(cache_key)
+        if chain is None:
+            chain = self._chain_for_node(node_key, chain_id, traverse_anonymous)
+            self._chain_cache.set(cache_key, chain)
+        return chain
+
+    def execution_plan(
+        self,
+        node_key: NodeKey,
+        chain_id: str,
+        traverse_anonymous: bool = True,
+        satisfied: Optional[Iterable[ParamKey]] = None,
+    ) -> ExecutionPlan:
+        """
+        Get the operations of the chain for `node_key` (see `chain_for_node`)
+        grouped into generations, in the order they should be called. The
+        operations within each generation depend only on earlier ones, so can
+        be called concurrently.
+
+        If `satisfied` is given then the plan is of the minimal chain, without
+        the operations only needed for those parameters (see
+        `minimal_chain_for_node`).
+
+        Where there are several edges between a pair of operations the plan
+        follows one: preferring `chain_id` over anonymous, then backlinks
+        over links.
+
+        Plans are cached, as for `chain_for_node`.
+
+        Raises:
+            CircularDependencyError
+        """
+        if satisfied is not None:
+            satisfied = frozenset(satisfied)
+        cache_key = (node_key, chain_id, traverse_anonymous, satisfied)
+        plan = self._plan_cache.get(cache_key)
+        if plan is None:
+            if satisfied is None:
+                chain = self.chain_for_node(node_key, chain_id, traverse_anonymous)
+            else:
+                chain = self.minimal_chain_for_node(
+                    node_key, chain_id, satisfied, traverse_anonymous
+                )
+            generations, links, remaining = _plan_chain(chain_id, chain)
+            if remaining:
+                raise CircularDependencyError(
+                    node_key, chain_id, self.chain_cycles(chain_id, traverse_anonymous)
+                )
+            plan = ExecutionPlan(
+                node_key=node_key,
+                chain_id=chain_id,
+                generations=generations,
+                links=links,
+            )
+            self._plan_cache.set(cache_key, plan)
+        return plan
+
+    def minimal_chain_for_node(
+        self,
+        node_key: NodeKey,
+        chain_id: str,
+        satisfied: Iterable[ParamKey] = (),
+        traverse_anonymous: bool = True,
+    ) -> nx.MultiDiGraph:
+        """
+        As for `chain_for_node`, but without the operations which are not
+        needed when the values of the `satisfied` parameters are already
+        known (e.g. from fixtures, so they apply to every operation in the
+        chain).
+
+        Starting from `node_key`, only the edges whose link parameters (or
+        request body) supply a value which is not satisfied are followed, and
+        so on from each operation reached. Where several links supply the same
+        value they are all kept (see `execution_plan` to choose between them).
+
+        NOTE: request body values have no `ParamKey`, so links supplying them
+        are always followed.
+
         Raises:
             CircularDependencyError
         """
-        if traverse_anonymous:
-            chain_key = frozenset([chain_id, None])
+        if node_key not in self.graph:
+            raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+
+        chain = self._minimal_chain([node_key], chain_id, satisfied, traverse_anonymous)
+        cycles = self._cycles.get(self._chain_key(chain_id, traverse_anonymous))
+        if (
+            cycles is not None
+            and node_key in cycles.downstream
+            and not nx.is_directed_acyclic_graph(
+                nx.DiGraph((u, v) for u, v in chain.edges() if u != v)
+            )
+        ):
+            raise CircularDependencyError(
+                node_key, chain_id, self.chain_cycles(chain_id, traverse_anonymous)
+            )
+        return nx.freeze(chain)
+
+    def merged_execution_plan(
+        self,
+        node_keys: Iterable[NodeKey],
+        chain_id: str,
+        traverse_anonymous: bool = True,
+        satisfied: Optional[Iterable[ParamKey]] = None,
+    ) -> MergedExecutionPlan:
+        """
+        As for `execution_plan`, but of the chains of all `node_keys` merged,
+        so that an operation in several of the chains (e.g. a login) is
+        called once, with its response supplying every dependent operation
+        (via `links`).
+
+        NOTE: a target may also be a prerequisite of another target, in which
+        case it is not in the last generation.
+
+        Raises:
+            CircularDependencyError: for the first target which depends on a
+                cycle
+        """
+        node_keys = tuple(dict.fromkeys(node_keys))
+        for node_key in node_keys:
+            if node_key not in self.graph:
+                raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+        if satisfied is None:
+            for node_key in node_keys:
+                self._check_cycles(node_key, chain_id, traverse_anonymous)
+            predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+            chain = self._chain_graph(_reachable(node_keys, predecessors), predecessors)
         else:
-            chain_key = frozenset([chain_id])
+            chain = self._minimal_chain(
+                node_keys, chain_id, satisfied, traverse_anonymous
+            )
+
+        generations, links, remaining = _plan_chain(chain_id, chain)
+        if remaining:
+            node_key = next(node_key for node_key in node_keys if node_key in remaining)
+            raise CircularDependencyError(
+                node_key, chain_id, self.chain_cycles(chain_id, traverse_anonymous)
+            )
+        return MergedExecutionPlan(
+            node_keys=node_keys,
+            chain_id=chain_id,
+            generations=generations,
+            links=links,
+        )
+
+    def chains_for_nodes(
+        self,
+        node_keys: Iterable[NodeKey],
+        chain_id: str,
+        traverse_anonymous: bool = True,
+    ) -> Dict[NodeKey, nx.MultiDiGraph]:
+        """
+        As for `chain_for_node`, for each of `node_keys`, but the ancestors of
+        all of them are found in a single pass over the chain (rather than a
+        walk per node, repeating the shared parts).
+
+        Returns:
+            {<node_key>: <chain>}
+        """
+        chains = {}
+        missing = []
+        for node_key in dict.fromkeys(node_keys):
+            chain = self._chain_cache.get((node_key, chain_id, traverse_anonymous))
+            if chain is None:
+                if node_key not in self.graph:
+                    raise nx.NetworkXError(
+                        f"The node {node_key} is not in the digraph."
+                    )
+                self._check_cycles(node_key, chain_id, traverse_anonymous)
+                missing.append(node_key)
+            else:
+                chains[node_key] = chain
+        if not missing:
+            return chains
+
+        predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+        ancestors = _reachable_sets(missing, predecessors)
+        for node_key in missing:
+            chain = self._chain_graph(ancestors[node_key], predecessors)
+            self._chain_cache.set((node_key, chain_id, traverse_anonymous), chain)
+            chains[node_key] = chain
+        return chains
+
+    def impact_of_node(
+        self, node_key: NodeKey, chain_id: str, traverse_anonymous: bool = True
+    ) -> nx.MultiDiGraph:
+        """
+        Get a (frozen) subgraph containing descendants of `node_key` which
+        are related via edges having this `chain_id` (and no chain_id, if
+        `traverse_anonymous=True`), i.e. the operations which depend on it
+        and so are affected if it changes.
+
+        NOTE: Includes the node identified by `node_key` itself.
+
+        Results are cached, as for `chain_for_node`.
+        """
+        cache_key = (node_key, chain_id, traverse_anonymous)
+        impact = self._impact_cache.get(cache_key)
+        if impact is None:
+            if node_key not in self.graph:
+                raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+            successors = self._chain_successors(chain_id, traverse_anonymous)
+            impact = self._chain_graph(
+                _reachable([node_key], successors),
+                self._chain_predecessors(chain_id, traverse_anonymous),
+            )
+            self._impact_cache.set(cache_key, impact)
+        return impact
+
+    def impact_of_nodes(
+        self,
+        node_keys: Iterable[NodeKey],
+        chain_id: str,
+        traverse_anonymous: bool = True,
+    ) -> Dict[NodeKey, nx.MultiDiGraph]:
+        """
+        As for `impact_of_node`, for each of `node_keys`, found in a single
+        pass (see `chains_for_nodes`).
+
+        Returns:
+            {<node_key>: <impact>}
+        """
+        impacts = {}
+        missing = []
+        for node_key in dict.fromkeys(node_keys):
+            impact = self._impact_cache.get((node_key, chain_id, traverse_anonymous))
+            if impact is None:
+                if node_key not in self.graph:
+                    raise nx.NetworkXError(
+                        f"The node {node_key} is not in the digraph."
+                    )
+                missing.append(node_key)
+            else:
+                impacts[node_key] = impact
+        if not missing:
+            return impacts
+
+        successors = self._chain_successors(chain_id, traverse_anonymous)
+        predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+        descendants = _reachable_sets(missing, successors)
+        for node_key in missing:
+            impact = self._chain_graph(descendants[node_key], predecessors)
+            self._impact_cache.set((node_key, chain_id, traverse_anonymous), impact)
+            impacts[node_key] = impact
+        return impacts
+
+    def depends_on(
+        self,
+        node_key: NodeKey,
+        dependency: NodeKey,
+        chain_id: str,
+        traverse_anonymous: bool = True,
+    ) -> bool:
+        """
+        Whether `dependency` is in the chain of `node_key` (see
+        `chain_for_node`), i.e. must be called before it.
+
+        Answered by a bit test against the transitive closure of the chain,
+        which is built on first use and kept (across `refresh`, if the chain's
+        edges are unchanged). Unlike `chain_for_node` this does not reject
+        chains having circular dependencies.
+
+        NOTE: an operation does not depend on itself.
+        """
+        for node in (node_key, dependency):
+            if node not in self.graph:
+                raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        if node_key == dependency:
+            return False
+
+        chain_key = self._chain_key(chain_id, traverse_anonymous)
+        closure = self._closures.get(chain_key)
+        if closure is None:
+            predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+            closure = _closure(
+                {node: None for adjacency in predecessors for node in adjacency},
+                predecessors,
+            )
+            self._closures[chain_key] = closure
+        position = closure.index.get(dependency)
+        return position is not None and bool(
+            closure.bits.get(node_key, 0) >> position & 1
+        )
+
+    def parameter_sources(
+        self, node_key: NodeKey
+    ) -> Dict[ParamKey, Tuple[ParamSource, ...]]:
+        """
+        The edges (of any chain) which supply a value for each parameter of
+        `node_key`, and the runtime expression each supplies it by.
+
+        NOTE: parameters which no edge supplies are absent (see
+        `unsupplied_params`) as are request body values, which have no
+        `ParamKey`.
+
+        Returns:
+            {<param key>: (<source>, ...)}
+        """
+        if node_key not in self.graph:
+            raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+        self._get_chain_index()
+        return dict(self._provenance.get(node_key, {}))
+
+    def unsupplied_params(
+        self,
+        chain_id: str,
+        traverse_anonymous: bool = True,
+        node_keys: Optional[Iterable[NodeKey]] = None,
+    ) -> Dict[NodeKey, List[ParamKey]]:
+        """
+        Required parameters of each operation (or each of `node_keys`) which
+        no edge of the chain supplies a value for, i.e. which must be known up
+        front to call the operation (see `minimal_chain_for_node`).
+
+        NOTE: a link from an operation to itself does not supply its own
+        parameters, since it can't do so for the first call.
+
+        Returns:
+            {<node_key>: [<param key>, ...]} of the operations having any
+        """
+        chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+        self._get_chain_index()
+        unsupplied = {}
+        for node_key in self.graph if node_keys is None else node_keys:
+            if node_key not in self.graph:
+                raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+            operation = self.graph.nodes[node_key].get("detail")
+            if operation is None:
+                continue
+            sources = self._provenance.get(node_key, {})
+            missing = [
+                param_key
+                for param_key, param in operation.parameters.items()
+                if param.required
+                and not any(
+                    source.key.chain_id in chain_ids and source.from_node != node_key
+                    for source in sources.get(param_key, ())
+                )
+            ]
+            if missing:
+                unsupplied[node_key] = missing
+        return unsupplied
+
+    def chain_cache_info(self) -> CacheInfo:
+        """
+        Hit/miss statistics for the `chain_for_node` result cache
+        """
+        return self._chain_cache.info()
+
+    def _chain_for_node(
+        self, node_key: NodeKey, chain_id: str, traverse_anonymous: bool
+    ) -> nx.MultiDiGraph:
+        if node_key not in self.graph:
+            raise nx.NetworkXError(f"The node {node_key} is not in the digraph.")
+
+        self._check_cycles(node_key, chain_id, traverse_anonymous)
+        predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+        return self._chain_graph(_reachable([node_key], predecessors), predecessors)
+
+    def _minimal_chain(
+        self,
+        node_keys: Iterable[NodeKey],
+        chain_id: str,
+        satisfied: Iterable[ParamKey],
+        traverse_anonymous: bool,
+    ) -> nx.MultiDiGraph:
+        """
+        Union of the (unfrozen) minimal chains of `node_keys`, found in one
+        walk (see `minimal_chain_for_node`)
+        """
+        satisfied = frozenset(satisfied)
+        predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+        chain = nx.MultiDiGraph()
+        chain.add_nodes_from((node, self.graph.nodes[node]) for node in node_keys)
+        to_visit = list(chain)
+        while to_visit:
+            node = to_visit.pop()
+            operation = self.graph.nodes[node].get("detail")
+            for chain_predecessors in predecessors:
+                for from_node, key, attrs in chain_predecessors.get(node, ()):
+                    if not _supplies_missing(attrs["detail"], operation, satisfied):
+                        continue
+                    if from_node not in chain:
+                        chain.add_node(from_node, **self.graph.nodes[from_node])
+                        to_visit.append(from_node)
+                    chain.add_edge(from_node, node, key, **attrs)
+        return chain
+
+    def chain_cycles(
+        self, chain_id: str, traverse_anonymous: bool = True, limit: int = 10
+    ) -> List[List[NodeKey]]:
+        """
+        A representative cycle (`[a, b, ..., z]` for `a -> b -> ... -> z -> a`)
+        from each of up to `limit` groups of operations in the chain (see
+        `chain_for_node`) which depend on each other.
+
+        NOTE: a link from an operation to itself (e.g. for pagination) is not
+        a dependency, so is not a cycle.
+        """
+        cycles = self._cycles.get(self._chain_key(chain_id, traverse_anonymous))
+        if cycles is None:
+            return []
+        predecessors = self._chain_predecessors(chain_id, traverse_anonymous)
+        return [
+            _find_cycle(min(component), component, predecessors)
+            for component in sorted(cycles.components, key=min)[:limit]
+        ]
+
+    def _find_cycles(self):
+        """
+        Find the strongly connected components of each chain (O(V+E) per
+        chain) so that chains having circular dependencies can be rejected
+        without searching each one for cycles.
+        """
+        chain_index = self._get_chain_index()
+        chain_keys = {frozenset([chain_id]) for chain_id in chain_index} | {
+            frozenset([chain_id, None]) for chain_id in chain_index
+        }
+        self._cycles = {}
+        for chain_key in chain_keys:
+            graph = nx.DiGraph()
+            graph.add_edges_from(
+                (from_node, to_node)
+                for chain_id in chain_key
+                for to_node, edges in chain_index.get(chain_id, {}).items()
+                for from_node, _, _ in edges
+                if from_node != to_node
+            )
+            components = [
+                frozenset(component)
+                for component in nx.strongly_connected_components(graph)
+                if len(component) > 1
+            ]
+            if not components:
+                continue
+            downstream = set().union(*components)
+            to_visit = list(downstream)
+            while to_visit:
+                for successor in graph.successors(to_visit.pop()):
+                    if successor not in downstream:
+                        downstream.add(successor)
+                        to_visit.append(successor)
+            self._cycles[chain_key] = ChainCycles(
+                components=tuple(components), downstream=frozenset(downstream)
+            )
+
+    def _chain_key(
+        self, chain_id: str, traverse_anonymous: bool
+    ) -> FrozenSet[Optional[str]]:
+        chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+        return frozenset(chain_ids & self._get_chain_index().keys())
 
-        if chain_id not in self._chains:
-            # materialize a view
-            chain_view = nx.subgraph_view(
-                self.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_key,
+    def _check_cycles(self, node_key: NodeKey, chain_id: str, traverse_anonymous: bool):
+        """
+        Raises:
+            CircularDependencyError: if `node_key` depends on a cycle
+        """
+        cycles = self._cycles.get(self._chain_key(chain_id, traverse_anonymous))
+        if cycles is not None and node_key in cycles.downstream:
+            raise CircularDependencyError(
+                node_key, chain_id, self.chain_cycles(chain_id, traverse_anonymous)
             )
-            # check for cycles...
-            # if not nx.is_directed_acyclic_graph(chain_view):
-            #     raise CircularDependencyError(
-            #         node_key,
-            #         chain_id,
-            #         nx.simple_cycles(chain_view),  # (generator)
-            #     )
-            # memoize
-            self._chains[chain_key] = nx.freeze(chain_view)
-        chain = self._chains[chain_key]
-
-        # filter chain for ancestors of node_key
-        dependencies = nx.ancestors(chain, node_key) | {node_key}
-        return chain.subgraph(dependencies)
+
+    def _chain_predecessors(
+        self, chain_id: str, traverse_anonymous: bool
+    ) -> List[ChainAdjacency]:
+        chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+        chain_index = self._get_chain_index()
+        return [chain_index[key] for key in chain_ids if key in chain_index]
+
+    def _chain_successors(
+        self, chain_id: str, traverse_anonymous: bool
+    ) -> List[ChainAdjacency]:
+        chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+        self._get_chain_index()
+        return [self._successors[key] for key in chain_ids if key in self._successors]
+
+    def _chain_graph(
+        self, nodes: Iterable[NodeKey], predecessors: List[ChainAdjacency],
+    ) -> nx.MultiDiGraph:
+        """
+        Frozen sub-graph of `nodes` and the chain edges between them
+        """
+        chain = nx.MultiDiGraph()
+        chain.add_nodes_from((node, self.graph.nodes[node]) for node in nodes)
+        chain.add_edges_from(
+            (from_node, node, key, attrs)
+            for node in chain
+            for chain_predecessors in predecessors
+            for from_node, key, attrs in chain_predecessors.get(node, ())
+            if from_node in chain
+        )
+        return nx.freeze(chain)
+
+    def _get_chain_index(self) -> ChainIndex:
+        """
+        Predecessors of each node, grouped by the chain_id of the edge they are
+        linked by (built once from the finished graph, along with the reverse
+        index: `_successors`, and the parameter index: `_provenance`)
+        """
+        if not self._chains:
+            chains: Dict[Optional[str], Dict[NodeKey, List[Any]]] = {}
+            successors: Dict[Optional[str], Dict[NodeKey, List[Any]]] = {}
+            provenance: Dict[NodeKey, Dict[ParamKey, List[ParamSource]]] = {}
+            for from_node, to_node, key, attrs in self.graph.edges(
+                keys=True, data=True
+            ):
+                chains.setdefault(key.chain_id, {}).setdefault(to_node, []).append(
+                    (from_node, key, attrs)
+                )
+                successors.setdefault(key.chain_id, {}).setdefault(
+                    from_node, []
+                ).append((to_node, key, attrs))
+                supplied = _link_params(
+                    attrs["detail"], self.graph.nodes[to_node].get("detail")
+                )
+                for param_key, expression in supplied.items():
+                    provenance.setdefault(to_node, {}).setdefault(param_key, []).append(
+                        ParamSource(from_node, key, expression)
+                    )
+            self._provenance = {
+                node: {
+                    param_key: tuple(sources) for param_key, sources in params.items()
+                }
+                for node, params in provenance.items()
+            }
+            self._chains = {
+                chain_id: {node: tuple(preds) for node, preds in chain.items()}
+                for chain_id, chain in chains.items()
+            }
+            self._successors = {
+                chain_id: {node: tuple(succs) for node, succs in chain.items()}
+                for chain_id, chain in successors.items()
+            }
+        return self._chains
 
     def _get_operation_id_path_index(
         self, doc_uri: str, doc: OpenAPI3Document
@@ -150,9 +1332,269 @@ class APIGraph:
             self._indexes[doc_uri] = _build_operation_id_path_index(doc)
         return self._indexes[doc_uri]
 
+    def _copy(self) -> "APIGraph":
+        """
+        Copy of self, which can be modified without affecting self
+        (edge source lists are replaced, never mutated, so are shared)
+        """
+        updated = copy.copy(self)
+        updated.graph = self.graph.copy()  # (unfrozen)
+        # (resolved refs may point into the old version of changed docs, and
+        # `self` may still be loading docs with its own table)
+        updated._load_options = dict(self._load_options, ref_table=RefTable())
+        updated.docs = self.docs.copy(**updated._load_options)
+        updated._dependencies = self._dependencies.copy()
+        updated._doc_hashes = self._doc_hashes.copy()
+        updated._links = self._links.copy()
+        updated._edge_sources = self._edge_sources.copy()
+        updated._indexes = self._indexes.copy()
+        updated._chains = {}
+        updated._successors = {}
+        updated._provenance = {}
+        updated._chain_cache = LRUCache(self._chain_cache.maxsize)
+        updated._plan_cache = LRUCache(self._plan_cache.maxsize)
+        updated._impact_cache = LRUCache(self._impact_cache.maxsize)
+        updated._compact = None
+        updated._cycles = {}
+        updated._closures = {}
+        updated.crawl_stats = self.crawl_stats.copy()
+        updated.uncrawled_uris = self.uncrawled_uris.copy()
+        return updated
+
+    def _remove_doc(self, doc_uri: str) -> Set[NodeKey]:
+        """
+        Remove everything that was added to the graph from `doc_uri`
+
+        (its nodes are left in place, without attrs, since they may still be
+        referred to by links in other docs; see `_prune_nodes`)
+
+        Returns:
+            nodes which may now be redundant
+        """
+        touched: Set[NodeKey] = set()
+        for edge, sources in list(self._edge_sources.items()):
+            remaining = [source for source in sources if source[0] != doc_uri]
+            if len(remaining) < len(sources):
+                self._set_edge_sources(edge, remaining)
+                touched.update(edge[:2])
+        for node_key, attrs in self.graph.nodes(data=True):
+            if node_key.doc_uri == doc_uri:
+                attrs.clear()
+                touched.add(node_key)
+        del self.docs[doc_uri]
+        del self._dependencies[doc_uri]
+        self._links.pop(doc_uri, None)
+        self._indexes.pop(doc_uri, None)
+        return touched
+
+    def _remove_unreachable(self) -> Set[NodeKey]:
+        """
+        Remove docs which are no longer linked to, directly or indirectly,
+        from any of `start_uris`
+
+        Returns:
+            nodes which may now be redundant
+        """
+        reachable = set()
+        to_visit = list(self.start_uris)
+        while to_visit:
+            uri = to_visit.pop()
+            if uri not in reachable:
+                reachable.add(uri)
+                to_visit.extend(self._links.get(uri, ()))
+        touched: Set[NodeKey] = set()
+        for uri in list(self.docs.keys() - reachable):
+            touched |= self._remove_doc(uri)
+        return touched
+
+    def _prune_nodes(self, node_keys: Iterable[NodeKey]):
+        """
+        Remove nodes which are neither operations from a crawled doc nor the
+        end of any edge
+        """
+        self.graph.remove_nodes_from(
+            [
+                node_key
+                for node_key in node_keys
+                if node_key in self.graph
+                and not self.graph.nodes[node_key]
+                and not self.graph.degree(node_key)
+            ]
+        )
+
+    def _add_edge_source(self, edge: EdgeTriple, doc_uri: str, attrs: Dict[str, Any]):
+        sources = self._edge_sources.get(edge, [])
+        self._set_edge_sources(edge, sources + [(doc_uri, attrs)])
+
+    def _set_edge_sources(self, edge: EdgeTriple, sources: List[EdgeSource]):
+        """
+        Update the graph edge to reflect `sources`, i.e. in case of redundant
+        edges backlinks win (and otherwise last-write wins).
+        """
+        from_node, to_node, key = edge
+        if not sources:
+            del self._edge_sources[edge]
+            if self.graph.has_edge(from_node, to_node, key):
+                self.graph.remove_edge(from_node, to_node, key)
+            return
+        self._edge_sources[edge] = sources
+        backlinks = [
+            attrs
+            for _, attrs in sources
+            if attrs["detail"].link_type is LinkType.BACKLINK
+        ]
+        attrs = (backlinks or [attrs for _, attrs in sources])[-1]
+        self.graph.add_edge(from_node, to_node, key=key, **attrs)
+
+    def _build(self, *start_uris: str):
+        self._crawl((uri, 0) for uri in start_uris)
+
     @inject.params(_dc_settings="settings")
-    def _build(self, start_uri: str, _dc_settings=None):
-        doc = load_doc(start_uri)
+    def _schedule(
+        self,
+        uris: Iterable[str],
+        depth: int,
+        scheduled: Dict[str, int],
+        _dc_settings=None,
+    ) -> List[str]:
+        """
+        Filter `uris` (found at `depth`) for those which should be crawled,
+        i.e. not already crawled or in-flight, and within the crawl budget
+        (see `Settings.CRAWL_MAX_DEPTH` and `Settings.CRAWL_MAX_DOCUMENTS`).
+
+        Those to crawl are added to `scheduled`, those over budget are added
+        to `uncrawled_uris`.
+
+        A uri already scheduled at a greater depth is moved up to `depth` (when
+        the crawl is not breadth-first, i.e. async or from `refreshed`) and, if
+        it was already crawled, the docs it links to are re-scheduled from there.
+        """
+        max_depth = _dc_settings.CRAWL_MAX_DEPTH
+        max_documents = _dc_settings.CRAWL_MAX_DOCUMENTS
+        to_crawl = []
+        for uri in sorted(uris):
+            if uri in scheduled:
+                if depth < scheduled[uri]:
+                    scheduled[uri] = depth
+                    if uri in self.crawl_stats:
+                        self.crawl_stats[uri] = self.crawl_stats[uri]._replace(
+                            depth=depth
+                        )
+                    if uri in self._links:
+                        to_crawl.extend(
+                            self._schedule(self._links[uri], depth + 1, scheduled)
+                        )
+                continue
+            if (max_depth is not None and depth > max_depth) or (
+                max_documents is not None and len(scheduled) >= max_documents
+            ):
+                self.uncrawled_uris.add(uri)
+                continue
+            scheduled[uri] = depth
+            self.uncrawled_uris.discard(uri)
+            to_crawl.append(uri)
+        return to_crawl
+
+    def _scheduled(self) -> Dict[str, int]:
+        # {<crawled uri>: <depth>}, to start crawling from
+        return {
+            uri: self.crawl_stats[uri].depth if uri in self.crawl_stats else 0
+            for uri in self.docs.keys()
+        }
+
+    def _crawl(self, start: Iterable[Tuple[str, int]]):
+        """
+        Crawl breadth-first from the `(<uri>, <depth>)` pairs in `start`
+        """
+        scheduled = self._scheduled()  # crawled or queued
+        queue: Deque[str] = deque()
+        for uri, depth in start:
+            queue.extend(self._schedule([uri], depth, scheduled))
+
+        while queue:
+            uri = queue.popleft()
+            depth = scheduled[uri]  # (may have moved up since queued)
+            started = time.perf_counter()
+            dependencies: Set[str] = set()
+            doc = load_doc(uri, dependencies=dependencies, **self._load_options)
+            loaded = time.perf_counter()
+            new_uris = self._add_doc(uri, doc, dependencies)
+            self.crawl_stats[uri] = CrawlStats(
+                depth=depth,
+                load_time=loaded - started,
+                add_time=time.perf_counter() - loaded,
+            )
+            queue.extend(self._schedule(new_uris, depth + 1, scheduled))
+
+    @inject.params(_dc_settings="settings", _dc_loader="jsonref_loader")
+    async def _build_async(self, *start_uris: str, _dc_settings=None, _dc_loader=None):
+        """
+        Crawl concurrently: each newly discovered doc uri is fetched as soon
+        as it is found, so that total time is bounded by the depth of the
+        reference tree rather than the number of docs.
+        """
+        semaphore = asyncio.Semaphore(_dc_settings.CRAWL_CONCURRENCY)
+        scheduled = self._scheduled()  # crawled or in-flight
+
+        async with _dc_loader.async_client() as client:
+
+            async def fetch(uri: str) -> Tuple[str, OpenAPI3Document, Set[str], float]:
+                dependencies: Set[str] = set()
+                async with semaphore:
+                    started = time.perf_counter()
+                    doc = await load_doc_async(
+                        uri,
+                        client=client,
+                        dependencies=dependencies,
+                        **self._load_options,
+                    )
+                return uri, doc, dependencies, time.perf_counter() - started
+
+            pending = {
+                asyncio.ensure_future(fetch(uri))
+                for uri in self._schedule(start_uris, 0, scheduled)
+            }
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        uri, doc, dependencies, load_time = task.result()
+                        depth = scheduled[uri]  # (may have moved up since)
+                        loaded = time.perf_counter()
+                        new_uris = self._add_doc(uri, doc, dependencies)
+                        self.crawl_stats[uri] = CrawlStats(
+                            depth=depth,
+                            load_time=load_time,
+                            add_time=time.perf_counter() - loaded,
+                        )
+                        pending.update(
+                            asyncio.ensure_future(fetch(new_uri))
+                            for new_uri in self._schedule(
+                                new_uris, depth + 1, scheduled
+                            )
+                        )
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    @inject.params(_dc_loader="jsonref_loader")
+    def _add_doc(
+        self,
+        start_uri: str,
+        doc: OpenAPI3Document,
+        dependencies: Set[str],
+        _dc_loader=None,
+    ) -> Set[str]:
+        """
+        Add the operations and links from `doc` to the graph.
+
+        `dependencies` are the uris of the docs that `doc` was built from.
+
+        Returns:
+            uris of other docs referenced by links in `doc`
+        """
         doc_index = self._get_operation_id_path_index(start_uri, doc)
 
         uris_to_crawl = set()
@@ -210,19 +1652,20 @@ class APIGraph:
             for name, backlink in backlinks.items():
                 from_node, chain_id, response_id = edge_args_for_backlink(backlink)
                 key = EdgeKey(chain_id, response_id)
-                self.graph.add_edge(
-                    from_node,
-                    to_node,
-                    key=key,
-                    response_id=response_id,
-                    chain_id=chain_id,
-                    detail=LinkDetail(
-                        link_type=LinkType.BACKLINK,
-                        name=name,
-                        description=backlink.description,
-                        parameters=backlink.parameters,
-                        requestBody=backlink.requestBody,
-                        requestBodyParameters=backlink.requestBodyParameters,
+                self._add_edge_source(
+                    (from_node, to_node, key),
+                    start_uri,
+                    dict(
+                        response_id=response_id,
+                        chain_id=chain_id,
+                        detail=LinkDetail(
+                            link_type=LinkType.BACKLINK,
+                            name=name,
+                            description=backlink.description,
+                            parameters=backlink.parameters,
+                            requestBody=backlink.requestBody,
+                            requestBodyParameters=backlink.requestBodyParameters,
+                        ),
                     ),
                 )
 
@@ -250,31 +1693,21 @@ class APIGraph:
             for name, link in links.items():
                 to_node, chain_id = edge_args_for_link(link)
                 key = EdgeKey(chain_id, response_id)
-                # in case of redundant edges, backlinks win
-                # (and otherwise last-write wins)
-                if (
-                    from_node in self.graph
-                    and to_node in self.graph[from_node]
-                    and key in self.graph[from_node][to_node]
-                    and (
-                        self.graph[from_node][to_node][key]["detail"].link_type
-                        is LinkType.BACKLINK
-                    )
-                ):
-                    continue
-                self.graph.add_edge(
-                    from_node,
-                    to_node,
-                    key=key,
-                    response_id=response_id,
-                    chain_id=chain_id,
-                    detail=LinkDetail(
-                        link_type=LinkType.LINK,
-                        name=name,
-                        description=link.description,
-                        parameters=link.parameters,
-                        requestBody=link.requestBody,
-                        requestBodyParameters=link.requestBodyParameters,
+                # (in case of redundant edges, backlinks win, see `_set_edge_sources`)
+                self._add_edge_source(
+                    (from_node, to_node, key),
+                    start_uri,
+                    dict(
+                        response_id=response_id,
+                        chain_id=chain_id,
+                        detail=LinkDetail(
+                            link_type=LinkType.LINK,
+                            name=name,
+                            description=link.description,
+                            parameters=link.parameters,
+                            requestBody=link.requestBody,
+                            requestBodyParameters=link.requestBodyParameters,
+                        ),
                     ),
                 )
 
@@ -352,9 +1785,9 @@ class APIGraph:
                     add_backlinks(node_key, operation.backlinks)
 
         self.docs[start_uri] = doc
-
-        # remove any docs we already crawled
-        uris_to_crawl -= self.docs.keys()
-
-        for uri in uris_to_crawl:
-            self._build(uri)
+        self._dependencies[start_uri] = dependencies
+        self._doc_hashes.update(
+            (uri, _dc_loader.content_hash(uri)) for uri in dependencies
+        )
+        self._links[start_uri] = frozenset(uris_to_crawl)
+        return uris_to_crawl
@@ -1,31 +1,398 @@
+import asyncio
+import atexit
+import json
+import multiprocessing
+import pickle
+import threading
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from hashlib import sha256
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Set, Tuple, Union
 from urllib import parse as urlparse
 
+import httpx
 import inject
 from jsonref import JsonRef
 from openapi_orm.loader import JSONOrYAMLRefLoader
-from openapi_orm.models import OpenAPI3Document
+from openapi_orm.models import (
+    OpenAPI3Document,
+    RefTableKey,
+    construct_trusted,
+    lazy_validation,
+    shared_refs,
+)
+from openapi_orm.parallel import parse_parallel
+
+from apigraph.types import NOT_SET
+
+
+class ModelCacheEntry(NamedTuple):
+    payload: bytes  # pickled OpenAPI3Document
+    dependencies: Dict[str, str]  # {<doc_uri>: <content hash>}
+
+
+@lru_cache(maxsize=None)
+def _models_fingerprint() -> str:
+    # invalidates cached models if the model definitions change
+    return sha256(OpenAPI3Document.schema_json().encode()).hexdigest()
+
+
+def _model_cache_key(location: str, settings, **options) -> Tuple[str, str, str]:
+    config = json.dumps(
+        {
+            "models": _models_fingerprint(),
+            "extensions": [
+                settings.BACKLINKS_ATTR,
+                settings.LINK_CHAIN_ID_ATTR,
+                settings.LINK_REQUEST_BODY_PARAMS_ATTR,
+            ],
+            "options": options,
+        },
+        sort_keys=True,
+    )
+    return ("model", location, sha256(config.encode()).hexdigest())
+
+
+class RefTable:
+    """
+    Resolved `$ref`s, shared by all the docs loaded for one `APIGraph` so
+    that each referenced doc is loaded (and has its own refs replaced) once,
+    and each referenced target is built into a single model instance.
+    """
+
+    docs: Dict[str, Any]  # {<doc uri>: <doc, with refs replaced by proxies>}
+    models: Dict[RefTableKey, Any]
+
+    def __init__(self):
+        self.docs = {}
+        self.models = {}
+
+    def clear(self):
+        """
+        Forget all resolved refs, e.g. after any of the docs have changed
+        (docs which were already loaded keep the models they were built with)
+        """
+        self.docs.clear()
+        self.models.clear()
+
+
+class _RefStore(MutableMapping):
+    """
+    View of `RefTable.docs` to use as jsonref's `_store`
+
+    Docs found in the store are reported as loaded, so that the loader can
+    still track the dependencies of each doc.
+    """
+
+    def __init__(self, docs: Dict[str, Any], loader):
+        self.docs = docs
+        self.loader = loader
+
+    @staticmethod
+    def normalize(uri: str) -> str:
+        return urlparse.urlsplit(uri).geturl()
+
+    def __getitem__(self, uri: str):
+        uri = self.normalize(uri)
+        doc = self.docs[uri]
+        self.loader._loaded(uri)
+        return doc
+
+    def __setitem__(self, uri: str, doc):
+        self.docs[self.normalize(uri)] = doc
+
+    def __delitem__(self, uri: str):
+        del self.docs[self.normalize(uri)]
+
+    def __contains__(self, uri):
+        return self.normalize(uri) in self.docs
+
+    def __iter__(self):
+        return iter(self.docs)
+
+    def __len__(self):
+        return len(self.docs)
+
+
+_validation_pools: Dict[int, ProcessPoolExecutor] = {}  # {<workers>: <pool>}
+_validation_pools_lock = threading.Lock()
+
+
+def _validation_pool(workers: int) -> ProcessPoolExecutor:
+    # (the async crawl loads docs from several threads at once)
+    with _validation_pools_lock:
+        pool = _validation_pools.get(workers)
+        if pool is None:
+            # (spawn, since forking a process which has other threads running,
+            # e.g. the async crawl's executor, is unsafe)
+            pool = _validation_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+@atexit.register
+def _shutdown_validation_pools():
+    with _validation_pools_lock:
+        pools = list(_validation_pools.values())
+        _validation_pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _needs_parallel(raw_doc: Any, settings) -> bool:
+    if settings.VALIDATION_WORKERS < 2:
+        return False
+    components = raw_doc.get("components") or {}
+    return len(raw_doc.get("paths") or {}) > settings.VALIDATION_CHUNK_SIZE or any(
+        len(val) > settings.VALIDATION_CHUNK_SIZE
+        for val in components.values()
+        if isinstance(val, dict)
+    )
+
+
+@inject.params(_dc_cache="cache", _dc_settings="settings")
+def _parse_doc(
+    raw: Any,
+    location: str,
+    loader,
+    load_on_repr: bool,
+    dependencies: Optional[Set[str]] = None,
+    lazy: bool = False,
+    trusted: bool = False,
+    ref_table: Optional[RefTable] = None,
+    _dc_cache=None,
+    _dc_settings=None,
+) -> OpenAPI3Document:
+    """
+    Resolve refs and validate `raw` into an OpenAPI3Document.
+
+    If `Settings.MODEL_CACHE` is enabled the validated model is cached,
+    along with the content hashes of every doc it was built from (i.e. the
+    doc itself plus any docs referenced via `$ref`), so that a warm start
+    skips validation for as long as none of those docs have changed.
+
+    If a `dependencies` set is passed, the uris of the docs that the result
+    was built from are added to it.
+
+    If `lazy=True` then path items and schemas are only validated when first
+    accessed. Such docs are not cached, since pickling would validate them.
+
+    If `trusted=True` then validation is skipped entirely (`lazy` is then
+    redundant and ignored).
+
+    If `Settings.VALIDATION_WORKERS` > 1 then docs with more paths (or
+    components of a given type) than `Settings.VALIDATION_CHUNK_SIZE` are
+    validated in chunks by a pool of worker processes.
+
+    If a `ref_table` is passed then resolved refs are shared with (and
+    re-used from) other docs loaded with the same table.
+    """
+    if dependencies is None:
+        dependencies = set()
+    lazy = lazy and not trusted
+    use_cache = _dc_settings.MODEL_CACHE and not lazy
+
+    if use_cache:
+        key = _model_cache_key(
+            location, _dc_settings, load_on_repr=load_on_repr, trusted=trusted
+        )
+        entry = _dc_cache.get(key)
+        if isinstance(entry, ModelCacheEntry) and all(
+            loader.content_hash(uri) == content_hash
+            for uri, content_hash in entry.dependencies.items()
+        ):
+            dependencies.update(entry.dependencies)
+            return pickle.loads(entry.payload)
+
+    payload = None
+    ref_kwargs: Dict[str, Any] = {}
+    models = None
+    if ref_table is not None:
+        ref_kwargs["_store"] = _RefStore(ref_table.docs, loader)
+        models = ref_table.models
+    with loader.track() as tracked, shared_refs(models):
+        if location in ref_kwargs.get("_store", ()):
+            # (already loaded, as the target of a $ref from another doc)
+            raw_doc = ref_kwargs["_store"][location]
+        else:
+            raw_doc = JsonRef.replace_refs(
+                raw,
+                base_uri=location,
+                loader=loader,
+                jsonschema=False,
+                load_on_repr=load_on_repr,
+                **ref_kwargs,
+            )
+        if trusted:
+            doc = construct_trusted(OpenAPI3Document, raw_doc)
+        elif not lazy and _needs_parallel(raw_doc, _dc_settings):
+            doc = parse_parallel(
+                raw_doc,
+                _validation_pool(_dc_settings.VALIDATION_WORKERS),
+                _dc_settings.VALIDATION_CHUNK_SIZE,
+            )
+        else:
+            with lazy_validation(lazy):
+                doc = OpenAPI3Document.parse_obj(raw_doc)
+        if use_cache:
+            try:
+                # (any refs not yet resolved are loaded while pickling)
+                payload = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+                pass
+
+    tracked.add(location)
+    dependencies.update(tracked)
+    if payload is not None:
+        _dc_cache.set(
+            key,
+            ModelCacheEntry(
+                payload=payload,
+                dependencies={uri: loader.content_hash(uri) for uri in tracked},
+            ),
+        )
+    return doc
 
 
 @inject.params(loader="jsonref_loader")
 def load_doc(
-    location: Union[str, Path], loader=None, load_on_repr: bool = False,
+    location: Union[str, Path],
+    loader=None,
+    load_on_repr: bool = False,
+    dependencies: Optional[Set[str]] = None,
+    lazy: bool = False,
+    trusted: bool = False,
+    ref_table: Optional[RefTable] = None,
 ) -> OpenAPI3Document:
     """
     Load OpenAPI spec (as JSON or YAML) and use jsonref to replace
     all `$ref` elements with lazy proxies
+
+    If a `dependencies` set is passed, the uris of all docs the result was
+    built from (i.e. `location` plus any docs referenced via `$ref`) are
+    added to it.
+
+    If `lazy=True` then path items and schemas are only validated when first
+    accessed (see `openapi_orm.models.lazy_validation`).
+
+    If `trusted=True` then the doc is assumed to be valid and the models are
+    built without any validation (see `openapi_orm.models.construct_trusted`).
+    Only use this for docs which have already been validated, e.g. in CI.
+
+    If a `ref_table` is passed then `$ref` targets are resolved and built once
+    across all the docs loaded with that table (see `RefTable`).
     """
     if isinstance(location, Path):
         location = f"file://{location}"
-    raw_doc = JsonRef.replace_refs(
+    return _parse_doc(
         loader(location),
-        base_uri=location,
-        loader=loader,
-        jsonschema=False,
-        load_on_repr=load_on_repr,
+        location,
+        loader,
+        load_on_repr,
+        dependencies,
+        lazy,
+        trusted,
+        ref_table,
     )
-    return OpenAPI3Document.parse_obj(raw_doc)
+
+
+@inject.params(loader="jsonref_loader")
+async def load_doc_async(
+    location: Union[str, Path],
+    client: httpx.AsyncClient,
+    loader=None,
+    load_on_repr: bool = False,
+    dependencies: Optional[Set[str]] = None,
+    lazy: bool = False,
+    trusted: bool = False,
+    ref_table: Optional[RefTable] = None,
+) -> OpenAPI3Document:
+    """
+    As for `load_doc` but the doc itself is fetched via the async `client`.
+
+    NOTE: parsing and validation are CPU-bound so they are run in the default
+    executor, leaving the event loop free to progress other fetches. Any
+    cross-doc `$ref` encountered during validation is resolved by the
+    (synchronous) `loader`.
+    """
+    if isinstance(location, Path):
+        location = f"file://{location}"
+    raw = await loader.load_async(location, client)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        _parse_doc,
+        raw,
+        location,
+        loader,
+        load_on_repr,
+        dependencies,
+        lazy,
+        trusted,
+        ref_table,
+    )
+
+
+def merkle_root(doc_hashes: Dict[str, str]) -> str:
+    """
+    Combine the content hashes of a set of docs into a single hash
+    """
+    root = sha256()
+    for uri, content_hash in sorted(doc_hashes.items()):
+        root.update(sha256(f"{uri}\n{content_hash}".encode()).digest())
+    return root.hexdigest()
+
+
+def client_kwargs(settings) -> Dict[str, Any]:
+    """
+    Config for the loader's `httpx` clients, derived from `settings`
+    """
+    return {
+        "http2": settings.HTTP2,
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT),
+        "pool_limits": httpx.PoolLimits(
+            max_keepalive=settings.HTTP_POOL_MAX_KEEPALIVE,
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        ),
+    }
+
+
+class CacheEntry(NamedTuple):
+    content_hash: str  # of the raw (unparsed) content
+    etag: Optional[str]  # validators from the response, if any...
+    last_modified: Optional[str]
+    fetched_at: float  # (timestamp)
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _is_http(uri: str) -> bool:
+    return urlparse.urlsplit(uri).scheme in ("http", "https")
+
+
+def _content_hash(data: Union[str, bytes]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return sha256(data).hexdigest()
+
+
+def _doc_key(uri: str) -> Tuple[str, str]:
+    return ("doc", uri)
 
 
 class DiskCachedJSONOrYAMLRefLoader(JSONOrYAMLRefLoader):
@@ -34,12 +401,25 @@ class DiskCachedJSONOrYAMLRefLoader(JSONOrYAMLRefLoader):
 
     - uses diskcache as its `store`
     - can load both json and yaml docs
+
+    Cached docs are considered fresh for `Settings.CACHE_EXPIRE` seconds.
+    After that, if `Settings.CACHE_REVALIDATE` is enabled and the server gave
+    us an `ETag` or `Last-Modified` validator, we make a conditional request
+    and a `304 Not Modified` response re-uses the cached (already parsed) doc.
+
+    The `CacheEntry` metadata for each uri is stored separately from the
+    parsed doc, so that checking a doc's `content_hash` is cheap.
     """
 
-    @inject.params(_dc_cache="cache")
-    def __init__(self, store=(), cache_results: bool = True, _dc_cache=None):
+    @inject.params(_dc_cache="cache", _dc_settings="settings")
+    def __init__(
+        self, store=(), cache_results: bool = True, _dc_cache=None, _dc_settings=None,
+    ):
+        super().__init__(
+            cache_results=cache_results, client_kwargs=client_kwargs(_dc_settings)
+        )
         self.store = _dc_cache
-        self.cache_results = cache_results
+        self._tracking = threading.local()
 
     @inject.params(_dc_settings="settings")
     def __call__(self, uri: str, _dc_settings, **kwargs):
@@ -49,10 +429,146 @@ class DiskCachedJSONOrYAMLRefLoader(JSONOrYAMLRefLoader):
         :param kwargs: Keyword arguments passed to :func:`json.loads`
         """
         uri = urlparse.urlsplit(uri).geturl()  # normalize
-        if uri in self.store:
-            return self.store[uri]
-        else:
-            result = self.get_remote_json(uri, **kwargs)
-            if self.cache_results:
-                self.store.set(key=uri, value=result, expire=_dc_settings.CACHE_EXPIRE)
-            return result
+        _, doc = self._load(uri, _dc_settings)
+        return doc
+
+    @inject.params(_dc_settings="settings")
+    def content_hash(self, uri: str, _dc_settings=None) -> str:
+        """
+        Hash of the current content of the doc at `uri`
+        (loading, or revalidating, it if necessary)
+        """
+        uri = urlparse.urlsplit(uri).geturl()  # normalize
+        entry, _ = self._load(uri, _dc_settings, with_doc=False)
+        return entry.content_hash
+
+    @inject.params(_dc_settings="settings")
+    def revalidate(self, uri: str, _dc_settings=None) -> str:
+        """
+        As for `content_hash` but the doc is checked for changes now, even if
+        the cached copy is still fresh according to `Settings.CACHE_EXPIRE`.
+        """
+        uri = urlparse.urlsplit(uri).geturl()  # normalize
+        entry, _ = self._load(uri, _dc_settings, with_doc=False, force=True)
+        return entry.content_hash
+
+    def _load(
+        self, uri: str, settings, with_doc: bool = True, force: bool = False
+    ) -> Tuple[CacheEntry, Any]:
+        entry, doc = self._get_entry(uri, with_doc)
+        if force or entry is None or not self._is_fresh(entry, settings):
+            if _is_http(uri) and settings.CACHE_REVALIDATE:
+                headers = entry.conditional_headers() if entry else {}
+                response = self.client.get(uri, headers=headers)
+                entry, doc = self._from_response(uri, entry, doc, response)
+            else:
+                data = self.fetch(uri)
+                if (
+                    not with_doc
+                    and entry is not None
+                    and entry.content_hash == _content_hash(data)
+                ):
+                    # unchanged, no need to re-parse
+                    entry = entry._replace(fetched_at=time.time())
+                else:
+                    entry, doc = self._from_data(uri, data)
+            self._set_entry(uri, entry, doc, settings)
+        self._loaded(uri)
+        return entry, doc
+
+    @inject.params(_dc_settings="settings")
+    async def load_async(
+        self, uri: str, client: httpx.AsyncClient, _dc_settings=None, **kwargs
+    ):
+        """
+        Async equivalent of `__call__`, remote docs are fetched via `client`
+        """
+        uri = urlparse.urlsplit(uri).geturl()  # normalize
+        entry, doc = self._get_entry(uri)
+        if entry is None or not self._is_fresh(entry, _dc_settings):
+            if _is_http(uri) and _dc_settings.CACHE_REVALIDATE:
+                headers = entry.conditional_headers() if entry else {}
+                response = await client.get(uri, headers=headers)
+                entry, doc = self._from_response(uri, entry, doc, response)
+            else:
+                entry, doc = self._from_data(uri, await self.fetch_async(uri, client))
+            self._set_entry(uri, entry, doc, _dc_settings)
+        self._loaded(uri)
+        return doc
+
+    @contextmanager
+    def track(self) -> Iterator[Set[str]]:
+        """
+        Collect the uris of all docs loaded (by the current thread) within
+        the context, i.e. including any remote docs loaded by jsonref while
+        resolving `$ref`s.
+        """
+        if not hasattr(self._tracking, "active"):
+            self._tracking.active = []
+        uris: Set[str] = set()
+        self._tracking.active.append(uris)
+        try:
+            yield uris
+        finally:
+            self._tracking.active.remove(uris)
+
+    def _loaded(self, uri: str):
+        for uris in getattr(self._tracking, "active", ()):
+            uris.add(uri)
+
+    def _get_entry(
+        self, uri: str, with_doc: bool = True
+    ) -> Tuple[Optional[CacheEntry], Any]:
+        entry = self.store.get(uri)
+        if not isinstance(entry, CacheEntry):
+            # (missing, or stored by an earlier version of apigraph)
+            return None, NOT_SET
+        if not with_doc:
+            return entry, NOT_SET
+        doc = self.store.get(_doc_key(uri), default=NOT_SET)
+        if doc is NOT_SET:
+            # (evicted independently of its entry)
+            return None, NOT_SET
+        return entry, doc
+
+    def _set_entry(self, uri: str, entry: CacheEntry, doc: Any, settings):
+        if not self.cache_results:
+            return
+        # entries we can revalidate are worth keeping after they go stale
+        expire = None if entry.has_validators else settings.CACHE_EXPIRE
+        if doc is not NOT_SET:
+            self.store.set(key=_doc_key(uri), value=doc, expire=expire)
+        self.store.set(key=uri, value=entry, expire=expire)
+
+    @staticmethod
+    def _is_fresh(entry: CacheEntry, settings) -> bool:
+        if settings.CACHE_EXPIRE is None:
+            return True
+        return time.time() - entry.fetched_at < settings.CACHE_EXPIRE
+
+    def _from_data(
+        self, uri: str, data: Union[str, bytes], content_type: Optional[str] = None
+    ) -> Tuple[CacheEntry, Any]:
+        entry = CacheEntry(
+            content_hash=_content_hash(data),
+            etag=None,
+            last_modified=None,
+            fetched_at=time.time(),
+        )
+        return entry, self.parse(data, content_type=content_type, uri=uri)
+
+    def _from_response(
+        self, uri: str, entry: Optional[CacheEntry], doc: Any, response: httpx.Response,
+    ) -> Tuple[CacheEntry, Any]:
+        if entry is not None and response.status_code == 304:
+            return entry._replace(fetched_at=time.time()), doc
+
+        response.raise_for_status()
+        entry, doc = self._from_data(
+            uri, response.content, response.headers.get("Content-Type")
+        )
+        entry = entry._replace(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return entry, doc
@@ -53,6 +53,23 @@ class EdgeKey(NamedTuple):
     response_id: str
 
 
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class CrawlStats(NamedTuple):
+    """
+    Timings (in seconds) for each doc crawled
+    """
+
+    depth: int  # number of links from the nearest start doc
+    load_time: float  # fetch, parse and validate
+    add_time: float  # add nodes and edges to the graph
+
+
 JSONPointerStr = str
 RuntimeExprStr = str
 
@@ -86,6 +103,17 @@ class ParamKey(NamedTuple):
     location: In
 
 
+class ParamSource(NamedTuple):
+    """
+    An edge which supplies a value for a parameter of its `to` operation
+    """
+
+    from_node: NodeKey
+    key: EdgeKey
+    # runtime expression (or `BacklinkParameter`) from the link/backlink
+    expression: Union[RuntimeExprStr, BacklinkParameter]
+
+
 class OperationDetail(NamedTuple):
     """
     Collates and normalises the relevant Operation details
@@ -105,3 +133,31 @@ class OperationDetail(NamedTuple):
     security_schemes: Set[
         FrozenSet[SecurityScheme]
     ]  # resolved for operation vs doc components
+
+
+class ExecutionPlan(NamedTuple):
+    """
+    Order in which to call the operations of a dependency chain
+    """
+
+    node_key: NodeKey  # the target operation (alone in the last generation)
+    chain_id: Optional[str]
+    # each generation depends only on earlier ones, so the operations within
+    # a generation can be called concurrently
+    generations: Tuple[Tuple[NodeKey, ...], ...]
+    # {(<from node>, <to node>): (<key>, <detail>)} of the edge to follow
+    links: Dict[Tuple[NodeKey, NodeKey], Tuple[EdgeKey, LinkDetail]]
+
+
+class MergedExecutionPlan(NamedTuple):
+    """
+    Order in which to call the operations of the chains of several targets,
+    each operation once however many of the chains it is in
+    """
+
+    node_keys: Tuple[NodeKey, ...]  # the target operations
+    chain_id: Optional[str]
+    generations: Tuple[Tuple[NodeKey, ...], ...]  # (as for `ExecutionPlan`)
+    # as for `ExecutionPlan`, so the response of an operation shared by
+    # several chains supplies each of its dependents
+    links: Dict[Tuple[NodeKey, NodeKey], Tuple[EdgeKey, LinkDetail]]
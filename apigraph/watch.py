@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+import inject
+
+from apigraph.graph import APIGraph
+
+FileStat = Optional[Tuple[int, int]]  # (<mtime ns>, <size>), None if missing
+
+
+def _local_path(uri: str) -> Optional[str]:
+    url = urlsplit(uri)
+    if url.scheme != "file":
+        return None
+    return unquote(url.path)
+
+
+def _stat(path: str) -> FileStat:
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    return result.st_mtime_ns, result.st_size
+
+
+class GraphWatcher:
+    """
+    Keeps an `APIGraph` up to date with its local (`file://`) source docs,
+    i.e. every doc the crawl reached, including those only included via `$ref`.
+
+    Changed files are detected by polling their mtime and size. Once a burst
+    of edits has settled (see `Settings.WATCH_DEBOUNCE`) the graph is
+    refreshed incrementally (see `APIGraph.refreshed`) and the updated graph
+    then replaces `apigraph` in a single assignment. So readers should fetch
+    `watcher.apigraph` for each query, and will never see a half-built graph.
+
+    e.g.
+
+        with GraphWatcher(APIGraph(doc_uri)) as watcher:
+            ...
+            chain = watcher.apigraph.chain_for_node(node_key, chain_id)
+
+    If a refresh fails (e.g. a doc is saved in an invalid state) the previous
+    graph is kept, and the error is passed to `on_error` (or else recorded as
+    `last_error`). The refresh is retried on the next change.
+    """
+
+    apigraph: APIGraph
+    last_error: Optional[Exception]
+
+    @inject.params(_dc_settings="settings")
+    def __init__(
+        self,
+        apigraph: APIGraph,
+        on_refresh: Optional[Callable[[APIGraph, Set[str]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        _dc_settings=None,
+    ):
+        self.apigraph = apigraph
+        self.on_refresh = on_refresh
+        self.on_error = on_error
+        self.last_error = None
+        self._settings = _dc_settings
+        self._stats: Dict[str, FileStat] = {}
+        self._pending: Set[str] = set()
+        self._last_change = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watch(apigraph)
+
+    def __enter__(self) -> "GraphWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Start polling in a (daemon) background thread
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="apigraph-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> Set[str]:
+        """
+        Check the watched files for changes, refreshing the graph if they
+        have settled.
+
+        Returns:
+            the uris of the (crawled) docs which were reloaded, if any
+        """
+        now = time.monotonic()
+        for uri, path in self._paths.items():
+            stat = _stat(path)
+            if stat != self._stats.get(uri):
+                self._stats[uri] = stat
+                self._pending.add(uri)
+                self._last_change = now
+
+        if not self._pending or now - self._last_change < self._settings.WATCH_DEBOUNCE:
+            return set()
+
+        changed, self._pending = self._pending, set()
+        try:
+            apigraph, reloaded = self.apigraph.refreshed(*changed)
+        except Exception as e:
+            self.last_error = e
+            if self.on_error is not None:
+                self.on_error(e)
+            return set()
+
+        self.last_error = None
+        if apigraph is not self.apigraph:
+            self.apigraph = apigraph
+            self._watch(apigraph)
+            if self.on_refresh is not None:
+                self.on_refresh(apigraph, reloaded)
+        return reloaded
+
+    def _watch(self, apigraph: APIGraph):
+        """
+        Watch the local source docs of `apigraph` (which may have changed
+        since the last refresh)
+        """
+        self._paths = {
+            uri: path
+            for uri, path in ((uri, _local_path(uri)) for uri in apigraph._doc_hashes)
+            if path is not None
+        }
+        for uri, path in self._paths.items():
+            if uri not in self._stats:
+                self._stats[uri] = _stat(path)
+        for uri in self._stats.keys() - self._paths.keys():
+            del self._stats[uri]
+
+    def _run(self):
+        while not self._stop.wait(self._settings.WATCH_INTERVAL):
+            self.poll()
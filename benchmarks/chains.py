@@ -0,0 +1,179 @@
+"""
+Compare finding the dependency chain of every node in a generated graph via
+the chain index (`APIGraph.chain_for_node`) and via the previous approach of
+filtering a view of the whole graph:
+
+    python benchmarks/chains.py [<n_paths> [<group_size>]]
+
+(the cached case repeats lookups, see `Settings.CHAIN_CACHE_SIZE`)
+
+Also counts the operations called by a plan per node vs one merged plan
+(`APIGraph.merged_execution_plan`), and compares pairwise dependency checks via `APIGraph.depends_on` with
+searching for a path in the filtered view, and a report of unsupplied
+parameters via `APIGraph.unsupplied_params` with checking every edge's link
+parameters.
+"""
+import random
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import networkx as nx
+import yaml
+
+from apigraph.graph import APIGraph
+
+CHAIN_IDS = ["default", "v1", None]
+
+
+def make_spec(n_paths: int, group_size: int) -> dict:
+    """
+    Each operation links to the next two in its group, in a rotating choice
+    of chains, supplying the required `id` parameter of the next
+    """
+    paths = {}
+    for i in range(n_paths):
+        links = {}
+        for offset in (1, 2):
+            if i + offset < n_paths and (i + offset) % group_size >= offset:
+                link = {"operationId": f"step{i + offset}"}
+                if offset == 1:
+                    link["parameters"] = {"id": "$response.body#/id"}
+                chain_id = CHAIN_IDS[(i + offset) % len(CHAIN_IDS)]
+                if chain_id is not None:
+                    link["x-apigraph-chainId"] = chain_id
+                links[f"next{offset}"] = link
+        paths[f"/steps/{i}"] = {
+            "get": {
+                "operationId": f"step{i}",
+                "parameters": [
+                    {
+                        "name": "id",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "string"},
+                    }
+                ],
+                "responses": {"200": {"description": "ok", "links": links}},
+            }
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Chains", "version": "1.0.0"},
+        "paths": paths,
+    }
+
+
+def _filtered_view(apigraph, node_key, chain_id):
+    chain_key = frozenset([chain_id, None])
+    chain_view = nx.subgraph_view(
+        apigraph.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_key,
+    )
+    return chain_view.subgraph(nx.ancestors(chain_view, node_key) | {node_key})
+
+
+def _batch(apigraph, nodes):
+    apigraph._chain_cache.clear()
+    return apigraph.chains_for_nodes(nodes, "default").values()
+
+
+def _impact_batch(apigraph, nodes):
+    apigraph._impact_cache.clear()
+    return apigraph.impact_of_nodes(nodes, "default").values()
+
+
+def _unsupplied_by_edges(apigraph, chain_id):
+    chain_ids = {chain_id, None}
+    unsupplied = {}
+    for node, attrs in apigraph.graph.nodes(data=True):
+        required = {
+            param_key
+            for param_key, param in attrs["detail"].parameters.items()
+            if param.required
+        }
+        for from_node, _, key, detail in apigraph.graph.in_edges(
+            node, keys=True, data="detail"
+        ):
+            if key.chain_id in chain_ids and from_node != node:
+                required = {
+                    param_key
+                    for param_key in required
+                    if param_key.name not in detail.parameters
+                }
+        if required:
+            unsupplied[node] = list(required)
+    return unsupplied
+
+
+def main(n_paths: int = 200, group_size: int = 50, repeat: int = 3):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "spec.yaml"
+        path.write_text(yaml.safe_dump(make_spec(n_paths, group_size)))
+        apigraph = APIGraph(f"file://{path}", trusted=True)
+
+    nodes = list(apigraph.graph)
+    cases = [
+        (
+            "filtered view",
+            lambda: [_filtered_view(apigraph, node, "default") for node in nodes],
+        ),
+        (
+            "chain index",
+            lambda: [apigraph._chain_for_node(node, "default", True) for node in nodes],
+        ),
+        (
+            "chain index (cached)",
+            lambda: [apigraph.chain_for_node(node, "default") for node in nodes],
+        ),
+        ("chains_for_nodes", lambda: _batch(apigraph, nodes)),
+        ("impact_of_nodes", lambda: _impact_batch(apigraph, nodes)),
+    ]
+
+    def _run(func):
+        # (views are lazy, so consume the edges of each chain)
+        return [list(chain.edges(keys=True, data=True)) for chain in func()]
+
+    print(f"{len(nodes)} nodes, {apigraph.graph.number_of_edges()} edges")
+    for name, func in cases:
+        best = min(timeit.repeat(lambda: _run(func), number=1, repeat=repeat))
+        print(f"{name:<40} {best * 1000:>10.1f} ms")
+
+    per_node = sum(
+        len(chain) for chain in apigraph.chains_for_nodes(nodes, "default").values()
+    )
+    merged = apigraph.merged_execution_plan(nodes, "default")
+    print(f"{'calls: execution_plan per node':<40} {per_node:>10}")
+    print(
+        f"{'calls: merged_execution_plan':<40} "
+        f"{sum(len(generation) for generation in merged.generations):>10}"
+    )
+
+    rng = random.Random(0)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(1000)]
+    chain_key = frozenset(["default", None])
+    chain_view = nx.subgraph_view(
+        apigraph.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_key,
+    )
+    pair_cases = [
+        (
+            "has_path: filtered view",
+            lambda: [nx.has_path(chain_view, dep, node) for node, dep in pairs],
+        ),
+        (
+            "depends_on",
+            lambda: [apigraph.depends_on(node, dep, "default") for node, dep in pairs],
+        ),
+    ]
+    pair_cases += [
+        ("unsupplied: edge params", lambda: _unsupplied_by_edges(apigraph, "default")),
+        ("unsupplied_params", lambda: apigraph.unsupplied_params("default")),
+    ]
+    print(f"{len(pairs)} pairs, then unsupplied params of all nodes")
+    for name, func in pair_cases:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f"{name:<40} {best * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
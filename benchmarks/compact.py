@@ -0,0 +1,75 @@
+"""
+Compare memory use and query times of a large generated `APIGraph`-like
+graph held as a networkx `MultiDiGraph` and as a `CompactGraph`:
+
+    python benchmarks/compact.py [<n_nodes> [<n_edges>]]
+
+(requires numpy)
+"""
+import random
+import sys
+import timeit
+import tracemalloc
+
+import networkx as nx
+
+from apigraph.compact import CompactGraph
+from apigraph.types import EdgeKey, NodeKey
+
+CHAIN_IDS = ["default", "v1", None]
+
+
+def make_graph(n_nodes: int, n_edges: int) -> nx.MultiDiGraph:
+    """
+    Random DAG (edges only point "forward") with rotating chainIds
+    """
+    rng = random.Random(0)
+    nodes = [
+        NodeKey("file:///catalog.yaml", f"/things/{i}", "get") for i in range(n_nodes)
+    ]
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(nodes)
+    for i in range(n_edges):
+        u = rng.randrange(n_nodes - 1)
+        v = rng.randrange(u + 1, min(u + 50, n_nodes))
+        key = EdgeKey(CHAIN_IDS[i % len(CHAIN_IDS)], "200")
+        graph.add_edge(nodes[u], nodes[v], key=key, detail=None)
+    return graph
+
+
+def _allocated(func):
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(n_nodes: int = 10000, n_edges: int = 50000, repeat: int = 3):
+    graph, graph_size = _allocated(lambda: make_graph(n_nodes, n_edges))
+    compact, compact_size = _allocated(lambda: CompactGraph(graph))
+    print(f"{n_nodes} nodes, {n_edges} edges")
+    print(f"{'memory: networkx':<40} {graph_size / 1024:>10.0f} KiB")
+    print(f"{'memory: compact':<40} {compact_size / 1024:>10.0f} KiB")
+
+    chain_ids = {"default", None}
+    view = nx.subgraph_view(
+        graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_ids
+    )
+    targets = random.Random(1).sample(list(graph), 20)
+    cases = [
+        ("ancestors: networkx", lambda: [nx.ancestors(view, n) for n in targets]),
+        (
+            "ancestors: compact",
+            lambda: [compact.ancestors(n, chain_ids) for n in targets],
+        ),
+        ("topological sort: networkx", lambda: list(nx.topological_sort(view))),
+        ("topological sort: compact", lambda: compact.topological_sort(chain_ids)),
+    ]
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f"{name:<40} {best * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
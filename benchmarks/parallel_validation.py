@@ -0,0 +1,42 @@
+"""
+Compare serial and process-pool validation of a large generated spec:
+
+    python benchmarks/parallel_validation.py [<n_paths> [<workers> [<chunk_size>]]]
+"""
+import multiprocessing
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+from openapi_orm.models import OpenAPI3Document
+from openapi_orm.parallel import parse_parallel
+from parse_formats import make_spec
+
+
+def main(n_paths: int = 5000, workers: int = 4, chunk_size: int = 250, repeat: int = 3):
+    spec = make_spec(n_paths)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        cases = [
+            ("serial (parse_obj)", lambda: OpenAPI3Document.parse_obj(spec)),
+            (
+                f"parallel ({workers} workers, chunks of {chunk_size})",
+                lambda: parse_parallel(spec, executor, chunk_size),
+            ),
+        ]
+
+        print(f"{n_paths} paths")
+        # (also warms up the worker processes)
+        assert cases[0][1]() == cases[1][1]()
+        timings = []
+        for name, func in cases:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            timings.append(best)
+            print(f"{name:<50} {best * 1000:>10.1f} ms")
+        print(f"{'speedup':<50} {timings[0] / timings[1]:>10.1f} x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""
+Compare the doc parsing paths on a large generated spec:
+
+    python benchmarks/parse_formats.py [<n_paths>]
+
+The "legacy" path is the original behaviour of `JSONOrYAMLRefLoader`:
+try `json.loads` and fall back to pure-python `yaml.safe_load`.
+"""
+import copy
+import json
+import sys
+import timeit
+
+import yaml
+from openapi_orm.loader import JSONOrYAMLRefLoader, YAMLLoader, json_loads
+
+
+def _legacy_parse(data):
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return yaml.safe_load(data)
+
+
+def make_spec(n_paths: int) -> dict:
+    with open("tests/fixtures/dependencies.yaml") as f:
+        template = yaml.load(f, Loader=YAMLLoader)
+    paths = {}
+    for i in range(n_paths // len(template["paths"]) + 1):
+        for path, path_item in template["paths"].items():
+            # (copy, so that yaml.dump does not emit anchors & aliases)
+            paths[f"/{i}{path}"] = copy.deepcopy(path_item)
+    return {**template, "paths": dict(list(paths.items())[:n_paths])}
+
+
+def main(n_paths: int = 1000, repeat: int = 3):
+    spec = make_spec(n_paths)
+    yaml_data = yaml.safe_dump(spec)
+    json_data = json.dumps(spec)
+
+    cases = [
+        ("yaml: legacy (json attempt + yaml.SafeLoader)", _legacy_parse, yaml_data),
+        (
+            f"yaml: sniffed ({YAMLLoader.__name__})",
+            lambda data: JSONOrYAMLRefLoader.parse(data, uri="spec.yaml"),
+            yaml_data,
+        ),
+        ("json: legacy (json.loads)", _legacy_parse, json_data),
+        (
+            f"json: sniffed ({json_loads.__module__}.loads)",
+            lambda data: JSONOrYAMLRefLoader.parse(data, uri="spec.json"),
+            json_data,
+        ),
+    ]
+
+    print(f"{n_paths} paths, yaml: {len(yaml_data)}B, json: {len(json_data)}B")
+    for name, func, data in cases:
+        assert func(data) == spec
+        best = min(timeit.repeat(lambda: func(data), number=1, repeat=repeat))
+        print(f"{name:<50} {best * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
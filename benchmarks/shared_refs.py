@@ -0,0 +1,90 @@
+"""
+Compare loading a generated spec, in which every operation references the
+same shared components, with and without a `RefTable`:
+
+    python benchmarks/shared_refs.py [<n_paths>]
+"""
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import inject
+import yaml
+
+from apigraph.loader import RefTable, load_doc
+
+COMPONENTS = {
+    "parameters": {
+        "page": {"name": "page", "in": "query", "schema": {"type": "integer"}},
+        "per_page": {"name": "per_page", "in": "query", "schema": {"type": "integer"}},
+    },
+    "responses": {
+        "error": {
+            "description": "error",
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "code": {"type": "integer"},
+                            "message": {"type": "string"},
+                        },
+                    }
+                }
+            },
+        }
+    },
+}
+
+
+def make_spec(n_paths: int) -> dict:
+    operation = {
+        "parameters": [
+            {"$ref": "#/components/parameters/page"},
+            {"$ref": "#/components/parameters/per_page"},
+        ],
+        "responses": {
+            "200": {"description": "ok"},
+            "4XX": {"$ref": "#/components/responses/error"},
+            "5XX": {"$ref": "#/components/responses/error"},
+        },
+    }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Shared refs", "version": "1.0.0"},
+        "paths": {f"/things/{i}": {"get": operation} for i in range(n_paths)},
+        "components": COMPONENTS,
+    }
+
+
+def _count_models(doc) -> int:
+    ids = set()
+    for path_item in doc.paths.values():
+        ids.update(id(param) for param in path_item.get.parameters)
+        ids.update(id(response) for response in path_item.get.responses.values())
+    return len(ids)
+
+
+def main(n_paths: int = 1000, repeat: int = 3):
+    inject.instance("settings").MODEL_CACHE = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "spec.yaml"
+        path.write_text(yaml.safe_dump(make_spec(n_paths)))
+
+        cases = [
+            ("per-reference models", lambda: load_doc(path)),
+            ("shared models (RefTable)", lambda: load_doc(path, ref_table=RefTable())),
+        ]
+
+        print(f"{n_paths} paths")
+        for name, func in cases:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            print(
+                f"{name:<40} {best * 1000:>10.1f} ms {_count_models(func()):>8} models"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
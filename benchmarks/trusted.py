@@ -0,0 +1,38 @@
+"""
+Compare building the models for a large generated spec with and without
+validation:
+
+    python benchmarks/trusted.py [<n_paths>]
+"""
+import sys
+import timeit
+
+from jsonref import JsonRef
+from openapi_orm.models import OpenAPI3Document, construct_trusted
+from parse_formats import make_spec
+
+
+def main(n_paths: int = 1000, repeat: int = 3):
+    spec = make_spec(n_paths)
+    raw_doc = JsonRef.replace_refs(spec, jsonschema=False)
+
+    cases = [
+        ("validated (parse_obj)", lambda: OpenAPI3Document.parse_obj(raw_doc)),
+        (
+            "trusted (construct_trusted)",
+            lambda: construct_trusted(OpenAPI3Document, raw_doc),
+        ),
+    ]
+
+    print(f"{n_paths} paths")
+    assert cases[0][1]() == cases[1][1]()
+    timings = []
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        timings.append(best)
+        print(f"{name:<50} {best * 1000:>10.1f} ms")
+    print(f"{'speedup':<50} {timings[0] / timings[1]:>10.1f} x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
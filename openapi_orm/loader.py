@@ -1,6 +1,9 @@
+import asyncio
 import json
-from pathlib import Path
-from typing import Union
+import threading
+from enum import Enum, auto
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Optional, Union
 from urllib import parse as urlparse
 from urllib.request import urlopen
 
@@ -8,6 +11,59 @@ import httpx
 import yaml
 from jsonref import JsonLoader, JsonRef
 
+try:
+    # (C-accelerated, when PyYAML was built against libyaml)
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YAMLLoader  # type: ignore
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads
+
+
+class DocFormat(Enum):
+    JSON = auto()
+    YAML = auto()
+
+
+JSON_EXTENSIONS = {".json"}
+YAML_EXTENSIONS = {".yaml", ".yml"}
+
+
+def sniff_format(
+    data: Union[str, bytes],
+    content_type: Optional[str] = None,
+    uri: Optional[str] = None,
+) -> DocFormat:
+    """
+    Guess the format of `data` from (in order of preference): the response
+    content-type, the file extension of `uri`, or the first non-whitespace
+    character (since JSON docs must start with an object or array).
+    """
+    if content_type:
+        mime_type = content_type.split(";")[0].strip().lower()
+        if mime_type == "application/json" or mime_type.endswith("+json"):
+            return DocFormat.JSON
+        if "yaml" in mime_type:
+            return DocFormat.YAML
+    if uri:
+        ext = PurePosixPath(urlparse.urlsplit(uri).path).suffix.lower()
+        if ext in JSON_EXTENSIONS:
+            return DocFormat.JSON
+        if ext in YAML_EXTENSIONS:
+            return DocFormat.YAML
+    start = data.lstrip()[:1]
+    if start in ("{", "[", b"{", b"["):
+        return DocFormat.JSON
+    return DocFormat.YAML
+
+
+def _read_local(uri: str) -> str:
+    # pass off to urllib and assume utf-8
+    return urlopen(uri).read().decode("utf-8")
+
 
 class JSONOrYAMLRefLoader(JsonLoader):
     """
@@ -15,25 +71,103 @@ class JSONOrYAMLRefLoader(JsonLoader):
 
     Can load both json and yaml docs, allowing us to resolve $ref in
     OpenAPI yaml docs.
+
+    Remote docs are fetched via a long-lived pooled `httpx.Client` (created
+    on first use from `client_kwargs`) so that connections to the same host
+    are kept alive and re-used. Call `close()` to release them.
     """
 
-    def get_remote_json(self, uri: str, **kwargs):
+    def __init__(
+        self,
+        store=(),
+        cache_results: bool = True,
+        client_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(store=store, cache_results=cache_results)
+        self.client_kwargs = client_kwargs or {}
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        # (docs may be parsed, and so refs resolved, from worker threads)
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(**self.client_kwargs)
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        Returns a new async client configured the same as `client`
+        (caller is responsible for closing it)
+        """
+        return httpx.AsyncClient(**self.client_kwargs)
+
+    def close(self):
+        """
+        Close the pooled client, if any. The loader remains usable, a new
+        client will be created on demand.
+        """
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def fetch(self, uri: str) -> Union[str, bytes]:
+        """
+        Returns the raw (unparsed) content of the doc at `uri`
+        """
         scheme = urlparse.urlsplit(uri).scheme
 
         if scheme in ("http", "https"):
-            response = httpx.get(uri)
+            response = self.client.get(uri)
             response.raise_for_status()
-            data = response.content
+            return response.content
         else:
-            # Otherwise, pass off to urllib and assume utf-8
-            data = urlopen(uri).read().decode("utf-8")
+            return _read_local(uri)
+
+    async def fetch_async(
+        self, uri: str, client: httpx.AsyncClient
+    ) -> Union[str, bytes]:
+        """
+        As for `fetch` but http(s) docs are fetched via the shared async
+        `client`, so that many docs can be in-flight at once.
+        """
+        scheme = urlparse.urlsplit(uri).scheme
+
+        if scheme in ("http", "https"):
+            response = await client.get(uri)
+            response.raise_for_status()
+            return response.content
+        else:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, _read_local, uri)
+
+    def get_remote_json(self, uri: str, **kwargs):
+        return self.parse(self.fetch(uri), uri=uri)
 
-        try:
-            doc = json.loads(data)
-        except json.JSONDecodeError:
-            doc = yaml.safe_load(data)
+    async def get_remote_json_async(
+        self, uri: str, client: httpx.AsyncClient, **kwargs
+    ):
+        return self.parse(await self.fetch_async(uri, client), uri=uri)
 
-        return doc
+    @staticmethod
+    def parse(
+        data: Union[str, bytes],
+        content_type: Optional[str] = None,
+        uri: Optional[str] = None,
+    ):
+        """
+        Parse `data` as JSON or YAML, according to `sniff_format`
+        (JSON is a subset of YAML so we fall back to the YAML parser if a
+        doc that looked like JSON fails to parse as such)
+        """
+        if sniff_format(data, content_type, uri) is DocFormat.JSON:
+            try:
+                return json_loads(data)
+            except ValueError:
+                pass
+        return yaml.load(data, Loader=YAMLLoader)
 
 
 def load_doc(
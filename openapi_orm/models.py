@@ -1,8 +1,28 @@
 import re
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
-from functools import singledispatch
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache, singledispatch
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
+from jsonref import JsonRef, LazyProxy
 from pydantic import (
     BaseModel as PydanticBaseModel,
     EmailStr,
@@ -65,12 +85,61 @@ def check_unique(val: List[Any]):
     return val
 
 
+RefTableKey = Tuple[Type[PydanticBaseModel], str]  # (<model>, <absolute ref uri>)
+
+_SHARED_REFS: ContextVar[Optional[Dict[RefTableKey, Any]]] = ContextVar(
+    "_SHARED_REFS", default=None
+)
+
+
+@contextmanager
+def shared_refs(table: Optional[Dict[RefTableKey, Any]]) -> Iterator[None]:
+    """
+    Within this context, each `$ref` target (i.e. jsonref proxy) is built
+    into a model once and the same instance is shared by every place that
+    references it. `table` records the models built so far, pass the same
+    one again to share them across docs.
+
+    (the models are immutable, so sharing instances is safe)
+    """
+    token = _SHARED_REFS.set(table)
+    try:
+        yield
+    finally:
+        _SHARED_REFS.reset(token)
+
+
+def _shared_ref(
+    model_cls: Type[PydanticBaseModel], value: Any, build: Callable[[Any], Any]
+) -> Any:
+    table = _SHARED_REFS.get()
+    if table is None or not isinstance(value, JsonRef):
+        return build(value)
+    # (attributes of the proxy itself, rather than of its target)
+    key = (model_cls, object.__getattribute__(value, "full_uri"))
+    try:
+        return table[key]
+    except KeyError:
+        # (only successful builds are recorded, since a `Union` field will
+        # try to validate the same value as each member type in turn)
+        model = table[key] = build(value)
+        return model
+
+
 class BaseModel(PydanticBaseModel):
     class Config:
         use_enum_values = True
         allow_mutation = False
         # TODO: auto CamelCase aliasing?
 
+    @classmethod
+    def validate(cls, value):
+        return _shared_ref(cls, value, cls._validate)
+
+    @classmethod
+    def _validate(cls, value):
+        return super().validate(value)
+
 
 class Extensible:
     """
@@ -88,6 +157,60 @@ class Extensible:
         extra = "allow"
 
 
+_LAZY_VALIDATION: ContextVar[bool] = ContextVar("_LAZY_VALIDATION", default=False)
+
+
+@contextmanager
+def lazy_validation(enabled: bool = True) -> Iterator[None]:
+    """
+    Models marked `LazilyValidated` which are parsed within this context
+    are not validated until first accessed.
+
+    e.g.
+
+        with lazy_validation():
+            doc = OpenAPI3Document.parse_obj(raw_doc)
+    """
+    token = _LAZY_VALIDATION.set(enabled)
+    try:
+        yield
+    finally:
+        _LAZY_VALIDATION.reset(token)
+
+
+class LazyModel(LazyProxy):
+    """
+    Proxy for a model instance which is validated (and memoized) on first
+    access, i.e. will raise `ValidationError` at that point if invalid.
+    """
+
+    def __init__(self, model_cls: Type[PydanticBaseModel], value: Any):
+        table = _SHARED_REFS.get()
+
+        def callback():
+            # (so that any nested lazy models remain lazy, and shared)
+            with lazy_validation(), shared_refs(table):
+                return super(LazilyValidated, model_cls)._validate(value)
+
+        super().__init__(callback)
+
+
+class LazilyValidated:
+    """
+    Mark a model as deferring its validation when parsed in the context of
+    `lazy_validation()`, the field then holds a `LazyModel` proxy instead.
+
+    Graph building only needs the operations, parameters, links etc. so
+    this avoids validating large `Schema` trees which are never read.
+    """
+
+    @classmethod
+    def _validate(cls, value):
+        if _LAZY_VALIDATION.get():
+            return LazyModel(cls, value)
+        return super()._validate(value)  # type: ignore
+
+
 class SimpleHashable(PydanticBaseModel):
     def __hash__(self):
         return hash(_make_hashable(self))
@@ -151,7 +274,7 @@ class XMLObj(Extensible, BaseModel):
 SchemaOrRef = Union["Reference", "Schema"]
 
 
-class Schema(Extensible, BaseModel):
+class Schema(Extensible, LazilyValidated, BaseModel):
     """
     This class is a combination of JSON Schema rules:
     https://tools.ietf.org/html/draft-wright-json-schema-validation-00
@@ -608,7 +731,7 @@ class Operation(Extensible, BaseModel):
     _check_responses = validator("responses", allow_reuse=True)(check_responses)
 
 
-class PathItem(Extensible, BaseModel):
+class PathItem(Extensible, LazilyValidated, BaseModel):
     class Config:
         fields = {"ref": {"alias": "$ref"}}
 
@@ -789,3 +912,205 @@ class OpenAPI3Document(Extensible, BaseModel):
     security: List[SecurityRequirement] = Field([])
     tags: List[Tag] = Field([])
     externalDocs: Optional[ExternalDocumentation] = None
+
+
+# resolve the forward-refs to models defined further down the module
+for _model in (Schema, PropertySchema, Encoding, Operation, Components):
+    _model.update_forward_refs()
+
+
+ModelT = TypeVar("ModelT", bound=PydanticBaseModel)
+
+Converter = Optional[Callable[[Any], Any]]  # (`None` means use value as-is)
+
+
+def _default_param_style(values: Dict[str, Any]) -> None:
+    if values.get("style") is None and values.get("in_") is not None:
+        values["style"] = IN_STYLE_DEFAULTS[In(values["in_"])]
+
+
+def _default_header_style(values: Dict[str, Any]) -> None:
+    if values.get("style") is None:
+        values["style"] = IN_STYLE_DEFAULTS[In.HEADER]
+
+
+# {<model>: <func which sets the defaults derived by its root validators>}
+TRUSTED_DEFAULTS: Dict[Type[PydanticBaseModel], Callable[[Dict[str, Any]], None]] = {
+    Parameter: _default_param_style,
+    Header: _default_header_style,
+}
+
+
+class _TrustedModel(NamedTuple):
+    fields: Dict[str, Tuple[str, Converter]]  # {<alias>: (<name>, <converter>)}
+    defaults: Dict[str, Any]  # {<name>: <default>} (in field order)
+    required: Tuple[str, ...]  # names
+    mutable_defaults: Tuple[str, ...]  # names, whose default must be copied
+    allow_extra: bool
+    has_private_attributes: bool
+
+
+_MISSING = object()
+
+
+def _is_model(type_: Any) -> bool:
+    return isinstance(type_, type) and issubclass(type_, PydanticBaseModel)
+
+
+@lru_cache(maxsize=None)
+def _trusted_model(model_cls: Type[PydanticBaseModel]) -> _TrustedModel:
+    hints = get_type_hints(model_cls)
+    model_fields = model_cls.__fields__
+    return _TrustedModel(
+        fields={
+            field.alias: (name, _converter(hints[name]))
+            for name, field in model_fields.items()
+        },
+        defaults={
+            name: _MISSING if field.required else field.default
+            for name, field in model_fields.items()
+        },
+        required=tuple(name for name, field in model_fields.items() if field.required),
+        mutable_defaults=tuple(
+            name
+            for name, field in model_fields.items()
+            if isinstance(field.default, (dict, list, set))
+        ),
+        allow_extra=model_cls.__config__.extra == "allow",
+        has_private_attributes=bool(model_cls.__private_attributes__),
+    )
+
+
+@lru_cache(maxsize=None)
+def _required_aliases(model_cls: Type[PydanticBaseModel]) -> FrozenSet[str]:
+    return frozenset(
+        field.alias for field in model_cls.__fields__.values() if field.required
+    )
+
+
+def _model_converter(model_cls: Type[PydanticBaseModel]) -> Converter:
+    def build(value):
+        return construct_trusted(model_cls, value)
+
+    def convert(value):
+        if type(value) is dict:  # (i.e. not a `$ref` proxy, so not shared)
+            return construct_trusted(model_cls, value)
+        if isinstance(value, dict):
+            return _shared_ref(model_cls, value, build)
+        return value
+
+    return convert
+
+
+def _union_converter(members: Tuple[Any, ...]) -> Converter:
+    """
+    Like pydantic we try the members from L-R, but a model "matches" simply
+    if all of its required fields are present.
+    """
+    candidates = []
+    for member in members:
+        if _is_model(member):
+            candidates.append((dict, _required_aliases(member), _converter(member)))
+        elif member is not type(None):  # noqa: E721
+            origin = get_origin(member) or member
+            if isinstance(origin, type):
+                candidates.append((origin, frozenset(), _converter(member)))
+    if all(member_converter is None for _, _, member_converter in candidates):
+        # (e.g. `Optional[str]`, the value is kept as it is whichever matches)
+        return None
+    if len(candidates) == 1:
+        # (e.g. `Optional[<model>]`, `None` values are never converted)
+        return candidates[0][2]
+
+    def convert(value):
+        for type_, required, member_converter in candidates:
+            if isinstance(value, type_) and (not required or value.keys() >= required):
+                return value if member_converter is None else member_converter(value)
+        return value
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def _converter(type_: Any) -> Converter:
+    """
+    Returns a function which builds a value of `type_` from trusted data
+    """
+    origin = get_origin(type_)
+    if origin is Union:
+        return _union_converter(get_args(type_))
+    if origin is list:
+        (item_type,) = get_args(type_)
+        item_converter = _converter(item_type)
+        if item_converter is None:
+            return None
+        return lambda value: [
+            item if item is None else item_converter(item) for item in value
+        ]
+    if origin is dict:
+        key_type, value_type = get_args(type_)
+        value_converter = _converter(value_type)
+        if key_type is not str:
+            if value_converter is None:
+                return None
+            return lambda value: {
+                key: val if val is None else value_converter(val)
+                for key, val in value.items()
+            }
+        # coerce keys as pydantic would (e.g. YAML loads unquoted `200:` as int)
+        if value_converter is None:
+            return lambda value: {str(key): val for key, val in value.items()}
+        return lambda value: {
+            str(key): val if val is None else value_converter(val)
+            for key, val in value.items()
+        }
+    if _is_model(type_):
+        # (deferred, models may be recursive)
+        return _model_converter(type_)
+    return None
+
+
+def construct_trusted(model_cls: Type[ModelT], value: Mapping) -> ModelT:
+    """
+    Build a `model_cls` instance (and its nested models) from `value` without
+    any validation, for docs that are known to be valid already.
+
+    This is like pydantic's `construct` but recursive, and fields are looked
+    up by their alias (e.g. `in`, `$ref`, `x-apigraph-backlinks`). Extra
+    fields are kept only on models which allow them.
+
+    NOTE: no validators are run, only the defaults derived by root validators
+    (see `TRUSTED_DEFAULTS`) are applied.
+    """
+    spec = _trusted_model(model_cls)
+    fields = spec.fields
+    values = spec.defaults.copy()
+    fields_set = set()
+    extra: Dict[str, Any] = {}
+    for key, val in value.items():
+        field = fields.get(key)
+        if field is None:
+            if spec.allow_extra:
+                extra[key] = val
+            continue
+        name, converter = field
+        values[name] = val if converter is None or val is None else converter(val)
+        fields_set.add(name)
+    for name in spec.mutable_defaults:
+        if name not in fields_set:
+            values[name] = values[name].copy()
+    for name in spec.required:
+        if values[name] is _MISSING:
+            del values[name]
+    if model_cls in TRUSTED_DEFAULTS:
+        TRUSTED_DEFAULTS[model_cls](values)
+    if extra:
+        values.update(extra)
+
+    # (as per `BaseModel.construct`, which we avoid as it is relatively slow)
+    model = model_cls.__new__(model_cls)
+    object.__setattr__(model, "__dict__", values)
+    object.__setattr__(model, "__fields_set__", fields_set)
+    if spec.has_private_attributes:
+        model._init_private_attributes()
+    return model
@@ -0,0 +1,133 @@
+import pickle
+import warnings
+from concurrent.futures import BrokenExecutor, Executor, Future
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Tuple
+
+from openapi_orm.models import Components, OpenAPI3Document
+from pydantic import ValidationError
+
+
+def _chunks(items: Mapping[str, Any], size: int) -> Iterator[Dict[str, Any]]:
+    it = iter(items.items())
+    while True:
+        chunk = dict(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# the pool could not run the chunks, e.g. a worker died or a chunk (or its
+# result) could not be pickled
+_POOL_ERRORS = (BrokenExecutor, pickle.PicklingError, TypeError, AttributeError)
+
+
+def _validate_field(
+    model_cls: Any, name: str, chunk: Dict[str, Any], loc: Tuple[str, ...]
+) -> Any:
+    # (error locations are relative to the doc root, and are raised against
+    # `OpenAPI3Document` since the errors must be pickled back to us)
+    value, errors = model_cls.__fields__[name].validate(
+        chunk, {}, loc=loc, cls=model_cls
+    )
+    if errors:
+        raise ValidationError([errors], OpenAPI3Document)
+    return value
+
+
+def _validate_paths(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return _validate_field(OpenAPI3Document, "paths", chunk, ("paths",))
+
+
+def _validate_components(name: str, alias: str, chunk: Dict[str, Any]) -> Any:
+    # (`Components` has no root validators, so each field validates alone)
+    return _validate_field(Components, name, chunk, ("components", alias))
+
+
+def _merge(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for result in results:
+        merged.update(result)
+    return merged
+
+
+def parse_parallel(
+    raw_doc: Mapping[str, Any], executor: Executor, chunk_size: int
+) -> OpenAPI3Document:
+    """
+    Equivalent to `OpenAPI3Document.parse_obj(raw_doc)`, but the `paths` and
+    the `components` maps are split into chunks of `chunk_size` items which
+    are validated by `executor` (i.e. a `ProcessPoolExecutor`, validation is
+    CPU-bound) and then reassembled.
+
+    Chunks are pickled to send to the workers, any jsonref proxies in them
+    are resolved (in this process) at that point.
+
+    A `ValidationError` has the same error locations as for `parse_obj`
+    (i.e. relative to the doc root), though only the errors of the first
+    invalid part of the doc are raised.
+
+    If the pool fails (e.g. a worker dies, or a chunk can't be pickled) then
+    a warning is issued and the whole doc is validated serially.
+    """
+    submitted: List[Future] = []
+
+    def submit(fn: Callable, *args: Any) -> Future:
+        submitted.append(executor.submit(fn, *args))
+        return submitted[-1]
+
+    try:
+        paths_futures = [
+            submit(_validate_paths, chunk)
+            for chunk in _chunks(raw_doc.get("paths") or {}, chunk_size)
+        ]
+
+        raw_components = raw_doc.get("components")
+        components_futures: Dict[str, Tuple[str, List[Future]]] = {}
+        if isinstance(raw_components, Mapping):
+            for name, field in Components.__fields__.items():
+                if isinstance(raw_components.get(field.alias), Mapping):
+                    components_futures[field.alias] = (
+                        name,
+                        [
+                            submit(_validate_components, name, field.alias, chunk)
+                            for chunk in _chunks(
+                                raw_components[field.alias], chunk_size
+                            )
+                        ],
+                    )
+
+        # the rest of the doc is small, validate it here while we wait
+        shell = {**raw_doc, "paths": {}}
+        if components_futures:
+            shell["components"] = {
+                key: val
+                for key, val in raw_components.items()
+                if key not in components_futures
+            }
+        doc = OpenAPI3Document.parse_obj(shell)
+
+        paths_results = [future.result() for future in paths_futures]
+        components_results = {
+            name: [future.result() for future in futures]
+            for name, futures in components_futures.values()
+        }
+    except _POOL_ERRORS as exc:
+        warnings.warn(
+            f"Parallel validation failed ({exc!r}), validating serially",
+            RuntimeWarning,
+        )
+        return OpenAPI3Document.parse_obj(raw_doc)
+    finally:
+        for future in submitted:
+            future.cancel()
+
+    paths = _merge(paths_results)
+    if components_results:
+        components = doc.components.copy(
+            update={
+                name: _merge(results) for name, results in components_results.items()
+            }
+        )
+        return doc.copy(update={"paths": paths, "components": components})
+    return doc.copy(update={"paths": paths})
@@ -1,8 +1,29 @@
+from pathlib import Path
+
 import inject
 import pytest
 
+from .helpers import str_doc_with_substitutions
+
 
 @pytest.fixture(scope="function", autouse=True)
 @inject.params(_dc_cache="cache")
 def clear_cache(_dc_cache=None):
     _dc_cache.clear()
+
+
+@pytest.fixture
+def cross_doc_links(tmp_path):
+    """
+    Writable copies of the cross-doc-links.yaml and links.yaml fixtures
+    """
+    links_path = tmp_path / "links.yaml"
+    links_path.write_text(Path("tests/fixtures/links.yaml").read_text())
+    links_uri = f"file://{links_path}"
+    doc_path = tmp_path / "cross-doc-links.yaml"
+    doc_path.write_text(
+        str_doc_with_substitutions(
+            "tests/fixtures/cross-doc-links.yaml", {"fixture_uri": links_uri}
+        )
+    )
+    return doc_path, links_path
@@ -1,7 +1,18 @@
+import inject
+import networkx as nx
 import pytest
+from openapi_orm.models import In
 
-from apigraph.graph import APIGraph, CircularDependencyError
-from apigraph.types import LinkDetail, LinkType, NodeKey
+from apigraph.graph import APIGraph, CircularDependencyError, _reachable_sets
+from apigraph.types import (
+    CacheInfo,
+    EdgeKey,
+    LinkDetail,
+    LinkType,
+    NodeKey,
+    ParamKey,
+    ParamSource,
+)
 
 from .helpers import fixture_uri
 
@@ -202,26 +213,739 @@ def test_chain_for_node_anonymous_memoization():
     assert sorted([node for node in no_anon_deps.nodes]) == no_anon_expected_nodes
 
 
-@pytest.mark.skip
-def test_chain_for_node_with_cycle():
-    # TODO:
-    # a circular dependency between endpoints... presumably it's possible
-    # to annotate one but we should validate and reject this on some level
-    # ...either when building graph? or when generating a request plan?
-    # (redundant edges in same direction don't count)
-    # ...if the cycle involves distinct chainIds should we ignore it?
-    # ...what about a cycle of anonymous links?
-    # Maybe this check should be in request-plan generation
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize("chain_id", [None, "default", "v1", "unknown"])
+def test_chain_for_node_matches_filtered_view(chain_id, traverse_anonymous):
+    """
+    Chains found via the chain index are the same as the ancestors found by
+    filtering the whole graph for edges in the chain.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+
+    chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+    chain_view = nx.subgraph_view(
+        apigraph.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_ids,
+    )
+    for node_key in apigraph.graph:
+        expected = chain_view.subgraph(nx.ancestors(chain_view, node_key) | {node_key})
+        chain = apigraph.chain_for_node(node_key, chain_id, traverse_anonymous)
+        assert sorted(chain.nodes(data=True)) == sorted(expected.nodes(data=True))
+        assert sorted(chain.edges(data=True, keys=True)) == sorted(
+            expected.edges(data=True, keys=True)
+        )
+        assert nx.is_frozen(chain)
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.chain_for_node(NodeKey(doc_uri, "/missing", "get"), chain_id)
+
+
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize("chain_id", [None, "default", "v1"])
+@inject.params(settings="settings")
+def test_chains_for_nodes(monkeypatch, chain_id, traverse_anonymous, settings=None):
+    """
+    Chains found for many nodes at once are the same as found one at a time.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    monkeypatch.setattr(settings, "CHAIN_CACHE_SIZE", 0)
+    apigraph = APIGraph(doc_uri)
+
+    node_keys = list(apigraph.graph)
+    chains = apigraph.chains_for_nodes(node_keys, chain_id, traverse_anonymous)
+
+    assert chains.keys() == set(node_keys)
+    for node_key, chain in chains.items():
+        expected = apigraph.chain_for_node(node_key, chain_id, traverse_anonymous)
+        assert sorted(chain.nodes) == sorted(expected.nodes)
+        assert sorted(chain.edges(data=True, keys=True)) == sorted(
+            expected.edges(data=True, keys=True)
+        )
+        assert nx.is_frozen(chain)
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.chains_for_nodes([NodeKey(doc_uri, "/missing", "get")], chain_id)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_reachable_sets(seed):
+    """
+    Ancestors found via the SCC condensation match `nx.ancestors`, including
+    for graphs with cycles.
+    """
+    graph = nx.gnp_random_graph(60, 0.04, seed=seed, directed=True)
+    predecessors = {
+        node: tuple((from_node, None, {}) for from_node in graph.predecessors(node))
+        for node in graph
+    }
+    node_keys = list(graph)[::3]
+
+    successors = {
+        node: tuple((to_node, None, {}) for to_node in graph.successors(node))
+        for node in graph
+    }
+
+    ancestors = _reachable_sets(node_keys, [predecessors])
+    descendants = _reachable_sets(node_keys, [successors])
+
+    assert ancestors.keys() == descendants.keys() == set(node_keys)
+    for node in node_keys:
+        assert sorted(ancestors[node]) == sorted(nx.ancestors(graph, node) | {node})
+        assert sorted(descendants[node]) == sorted(nx.descendants(graph, node) | {node})
+
+
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize("chain_id", [None, "default", "v1"])
+def test_impact_of_node(chain_id, traverse_anonymous):
+    """
+    The impact of a node is its descendants via edges in the chain, and is
+    the same whether found one at a time or in bulk.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+
+    chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+    chain_view = nx.subgraph_view(
+        apigraph.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_ids,
+    )
+    impacts = apigraph.impact_of_nodes(apigraph.graph, chain_id, traverse_anonymous)
+    assert impacts.keys() == set(apigraph.graph)
+    for node_key in apigraph.graph:
+        expected = chain_view.subgraph(
+            nx.descendants(chain_view, node_key) | {node_key}
+        )
+        impact = apigraph.impact_of_node(node_key, chain_id, traverse_anonymous)
+        assert impacts[node_key] is impact
+        assert sorted(impact.nodes) == sorted(expected.nodes)
+        assert sorted(impact.edges(data=True, keys=True)) == sorted(
+            expected.edges(data=True, keys=True)
+        )
+        assert nx.is_frozen(impact)
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.impact_of_node(NodeKey(doc_uri, "/missing", "get"), chain_id)
+
+
+def test_impact_of_node_example():
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+
+    impact = apigraph.impact_of_node(
+        NodeKey(doc_uri, "/2.0/users", "post"), "default", traverse_anonymous=False
+    )
+    assert sorted(impact.nodes) == [
+        NodeKey(doc_uri, "/2.0/repositories/{username}", "get"),
+        NodeKey(doc_uri, "/2.0/repositories/{username}/{slug}", "get"),
+        NodeKey(doc_uri, "/2.0/users", "post"),
+        NodeKey(doc_uri, "/2.0/users/{username}", "get"),
+    ]
+
+
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize("chain_id", [None, "default", "v1", "unknown"])
+@pytest.mark.parametrize(
+    "fixture", ["dependencies.yaml", "links-with-cycle-in-chain.yaml"]
+)
+def test_depends_on(fixture, chain_id, traverse_anonymous):
+    """
+    Dependency checks against the chain's closure agree with a search of the
+    whole graph for paths via edges in the chain (including via cycles).
+    """
+    doc_uri = fixture_uri(fixture)
+    apigraph = APIGraph(doc_uri)
+
+    chain_ids = {chain_id, None} if traverse_anonymous else {chain_id}
+    chain_view = nx.subgraph_view(
+        apigraph.graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_ids,
+    )
+    for node_key in apigraph.graph:
+        for dependency in apigraph.graph:
+            assert apigraph.depends_on(
+                node_key, dependency, chain_id, traverse_anonymous
+            ) == (
+                dependency != node_key and nx.has_path(chain_view, dependency, node_key)
+            )
+    assert len(apigraph._closures) == 1
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.depends_on(
+            NodeKey(doc_uri, "/missing", "get"), node_key, chain_id,
+        )
+
+
+def test_depends_on_refresh(tmp_path):
+    """
+    Closures of chains which a refresh did not change are kept.
+    """
+    path = tmp_path / "plan.yaml"
+    path.write_text(PLAN_DOC)
+    doc_uri = f"file://{path}"
+    apigraph = APIGraph(doc_uri)
+
+    create_user = NodeKey(doc_uri, "/users", "post")
+    get_order = NodeKey(doc_uri, "/orders/{id}", "get")
+
+    assert apigraph.depends_on(get_order, create_user, "default")
+    assert not apigraph.depends_on(
+        get_order, create_user, "v1", traverse_anonymous=False
+    )
+    closure = apigraph._closures[frozenset(["default", None])]
+
+    path.write_text(
+        PLAN_DOC
+        + """\
+      x-apigraph-backlinks:
+        orderUser:
+          operationId: createUser
+          response: '201'
+          chainId: v1
+"""
+    )
+    assert apigraph.refresh() == {doc_uri}
+
+    assert apigraph._closures[frozenset(["default", None])] is closure
+    assert apigraph.depends_on(get_order, create_user, "default")
+    assert apigraph.depends_on(get_order, create_user, "v1", traverse_anonymous=False)
+
+
+def test_chains_for_nodes_cache():
+    """
+    `chains_for_nodes` shares the `chain_for_node` result cache.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    user = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+
+    chain = apigraph.chain_for_node(repos, "default")
+    chains = apigraph.chains_for_nodes([repos, user, user], "default")
+    assert chains[repos] is chain
+    assert apigraph.chain_for_node(user, "default") is chains[user]
+    assert apigraph.chain_cache_info() == CacheInfo(
+        hits=2, misses=2, maxsize=1024, currsize=2
+    )
+
+
+@inject.params(settings="settings")
+def test_chain_for_node_cache(monkeypatch, settings=None):
+    """
+    Repeated `chain_for_node` calls are served from a bounded LRU cache.
+    """
+    monkeypatch.setattr(settings, "CHAIN_CACHE_SIZE", 2)
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    user = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+
+    chain = apigraph.chain_for_node(repos, "default")
+    assert apigraph.chain_for_node(repos, "default") is chain
+    assert (
+        apigraph.chain_for_node(repos, "default", traverse_anonymous=False) is not chain
+    )
+    assert apigraph.chain_cache_info() == CacheInfo(
+        hits=1, misses=2, maxsize=2, currsize=2
+    )
+
+    # least recently used is evicted
+    apigraph.chain_for_node(repos, "default")
+    apigraph.chain_for_node(user, "default")
+    assert apigraph.chain_for_node(repos, "default") is chain
+    assert apigraph.chain_cache_info() == CacheInfo(
+        hits=3, misses=3, maxsize=2, currsize=2
+    )
+    apigraph.chain_for_node(repos, "default", traverse_anonymous=False)
+    assert apigraph.chain_cache_info().misses == 4
+
+    monkeypatch.setattr(settings, "CHAIN_CACHE_SIZE", 0)
+    apigraph = APIGraph(doc_uri)
+    assert apigraph.chain_for_node(repos, "default") is not apigraph.chain_for_node(
+        repos, "default"
+    )
+    assert apigraph.chain_cache_info().currsize == 0
+
+
+PLAN_DOC = """
+openapi: 3.0.0
+info:
+  title: Execution Plan
+  version: 1.0.0
+paths:
+  /users:
+    post:
+      operationId: createUser
+      responses:
+        '201':
+          description: ok
+          links:
+            userOrder:
+              operationId: createOrder
+              x-apigraph-chainId: default
+  /products:
+    post:
+      operationId: createProduct
+      responses:
+        '201':
+          description: ok
+          links:
+            productOrder:
+              operationId: createOrder
+  /orders:
+    post:
+      operationId: createOrder
+      x-apigraph-backlinks:
+        userOrder:
+          operationId: createUser
+          response: '201'
+      responses:
+        '201':
+          description: ok
+          links:
+            getOrder:
+              operationId: getOrder
+  /orders/{id}:
+    get:
+      operationId: getOrder
+      responses:
+        '200':
+          description: ok
+"""
+
+
+@pytest.mark.parametrize("chain_id", ["default", None])
+def test_execution_plan(tmp_path, chain_id):
+    """
+    Operations are grouped into generations which depend only on earlier
+    ones, and one edge is chosen between each pair of operations.
+    """
+    path = tmp_path / "plan.yaml"
+    path.write_text(PLAN_DOC)
+    doc_uri = f"file://{path}"
+    apigraph = APIGraph(doc_uri)
+
+    create_user = NodeKey(doc_uri, "/users", "post")
+    create_product = NodeKey(doc_uri, "/products", "post")
+    create_order = NodeKey(doc_uri, "/orders", "post")
+    get_order = NodeKey(doc_uri, "/orders/{id}", "get")
+
+    plan = apigraph.execution_plan(get_order, chain_id)
+
+    assert plan.node_key == get_order
+    assert plan.chain_id == chain_id
+    assert plan.generations == (
+        (create_product, create_user),
+        (create_order,),
+        (get_order,),
+    )
+    assert plan.links.keys() == {
+        (create_user, create_order),
+        (create_product, create_order),
+        (create_order, get_order),
+    }
+    # link in the requested chain is preferred, else the (anonymous) backlink
+    key, detail = plan.links[(create_user, create_order)]
+    assert key.chain_id == chain_id
+    assert detail.link_type is (
+        LinkType.LINK if chain_id == "default" else LinkType.BACKLINK
+    )
+
+    assert apigraph.execution_plan(get_order, chain_id) is plan
+    assert apigraph.execution_plan(create_order, chain_id).generations == (
+        (create_product, create_user),
+        (create_order,),
+    )
+
+
+def test_execution_plan_with_cycle():
+    doc_uri = fixture_uri("links-with-cycle-in-chain.yaml")
+    apigraph = APIGraph(doc_uri)
+    node_key = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+
+    with pytest.raises(CircularDependencyError) as excinfo:
+        apigraph.execution_plan(node_key, chain_id=None)
+    assert excinfo.value.args == (node_key, None, apigraph.chain_cycles(None))
+
+
+@pytest.mark.parametrize("chain_id,traverse_anonymous", [(None, False), ("v1", True)])
+def test_chain_for_node_with_cycle(chain_id, traverse_anonymous):
+    """
+    Chains which depend on a cycle are rejected, listing the cycle.
+    (found once, when the graph is built)
+    """
     doc_uri = fixture_uri("links-with-cycle-in-chain.yaml")
 
     apigraph = APIGraph(doc_uri)
     assert apigraph.docs.keys() == {doc_uri}
 
-    with pytest.raises(CircularDependencyError):
+    users_v1 = NodeKey(doc_uri, "/1.0/users/{username}", "get")
+    users = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    expected_cycle = [users_v1, repos]
+
+    with pytest.raises(CircularDependencyError) as excinfo:
         apigraph.chain_for_node(
-            node_key=NodeKey(doc_uri, "/2.0/repositories/{username}", "get"),
-            chain_id=None,
-            traverse_anonymous=False,
+            node_key=repos, chain_id=chain_id, traverse_anonymous=traverse_anonymous,
+        )
+    assert excinfo.value.args == (repos, chain_id, [expected_cycle])
+    with pytest.raises(CircularDependencyError):
+        apigraph.chains_for_nodes([users, repos], chain_id, traverse_anonymous)
+
+    assert apigraph.chain_cycles(chain_id, traverse_anonymous) == [expected_cycle]
+    assert apigraph.chain_cycles(chain_id, traverse_anonymous, limit=0) == []
+    # not downstream of the cycle
+    assert list(apigraph.chain_for_node(users, chain_id, traverse_anonymous)) == [users]
+    # cycle is only in the anonymous chain
+    assert apigraph.chain_cycles("v1", traverse_anonymous=False) == []
+    assert repos in apigraph.chain_for_node(repos, "v1", traverse_anonymous=False)
+
+
+def test_chain_for_node_self_link(tmp_path):
+    """
+    A link from an operation to itself (e.g. pagination) is not a cycle.
+    """
+    path = tmp_path / "self-link.yaml"
+    path.write_text(SELF_LINK_DOC)
+    doc_uri = f"file://{path}"
+    apigraph = APIGraph(doc_uri)
+    node_key = NodeKey(doc_uri, "/items", "get")
+
+    chain = apigraph.chain_for_node(node_key, None)
+    assert list(chain.edges(node_key)) == [(node_key, node_key)]
+    assert apigraph.chain_cycles(None) == []
+    assert apigraph.execution_plan(node_key, None).generations == ((node_key,),)
+
+
+SELF_LINK_DOC = """
+openapi: 3.0.0
+info:
+  title: Self Link
+  version: 1.0.0
+paths:
+  /items:
+    get:
+      operationId: getItems
+      responses:
+        '200':
+          description: ok
+          links:
+            nextPage:
+              operationId: getItems
+"""
+
+
+MINIMAL_DOC = """
+openapi: 3.0.0
+info:
+  title: Minimal Chain
+  version: 1.0.0
+paths:
+  /login:
+    post:
+      operationId: login
+      responses:
+        '200':
+          description: ok
+          links:
+            loggedIn:
+              operationId: getItem
+  /orders:
+    post:
+      operationId: createOrder
+      responses:
+        '201':
+          description: ok
+          links:
+            orderItem:
+              operationId: getItem
+              parameters:
+                path.orderId: $response.body#/id
+  /items:
+    post:
+      operationId: createItem
+      x-apigraph-backlinks:
+        itemOrder:
+          operationId: createOrder
+          response: '201'
+          requestBodyParameters:
+            /orderId: $response.body#/id
+      requestBody:
+        content:
+          application/json:
+            schema:
+              type: object
+      responses:
+        '201':
+          description: ok
+          links:
+            item:
+              operationId: getItem
+              parameters:
+                itemId: $response.body#/id
+  /orders/{orderId}/items/{itemId}:
+    get:
+      operationId: getItem
+      parameters:
+        - name: orderId
+          in: path
+          required: true
+          schema:
+            type: string
+        - name: itemId
+          in: path
+          required: true
+          schema:
+            type: string
+      responses:
+        '200':
+          description: ok
+"""
+
+
+@pytest.mark.parametrize(
+    "satisfied,expected",
+    [
+        ([], {"createOrder", "createItem"}),
+        ([ParamKey("orderId", In.QUERY)], {"createOrder", "createItem"}),
+        # (createItem still needs the order for its request body)
+        ([ParamKey("orderId", In.PATH)], {"createOrder", "createItem"}),
+        ([ParamKey("itemId", In.PATH)], {"createOrder"}),
+        ([ParamKey("orderId", In.PATH), ParamKey("itemId", In.PATH)], set()),
+    ],
+)
+def test_minimal_chain_for_node(tmp_path, satisfied, expected):
+    """
+    Only the links which supply values that are not already known are
+    followed (the login link supplies nothing, so is never needed).
+    """
+    path = tmp_path / "minimal.yaml"
+    path.write_text(MINIMAL_DOC)
+    doc_uri = f"file://{path}"
+    apigraph = APIGraph(doc_uri)
+
+    operation_ids = {
+        NodeKey(doc_uri, "/login", "post"): "login",
+        NodeKey(doc_uri, "/orders", "post"): "createOrder",
+        NodeKey(doc_uri, "/items", "post"): "createItem",
+        NodeKey(doc_uri, "/orders/{orderId}/items/{itemId}", "get"): "getItem",
+    }
+    get_item = NodeKey(doc_uri, "/orders/{orderId}/items/{itemId}", "get")
+
+    chain = apigraph.minimal_chain_for_node(get_item, None, satisfied)
+
+    assert {operation_ids[node] for node in chain} == expected | {"getItem"}
+    assert nx.is_frozen(chain)
+    full_chain = apigraph.chain_for_node(get_item, None)
+    assert set(chain.edges(keys=True)) <= set(full_chain.edges(keys=True))
+    # (every operation supplies a value to the chain)
+    assert all(node == get_item or chain.out_degree(node) > 0 for node in chain)
+
+    plan = apigraph.execution_plan(get_item, None, satisfied=satisfied)
+    assert {node for generation in plan.generations for node in generation} == set(
+        chain
+    )
+    assert apigraph.execution_plan(get_item, None, satisfied=satisfied) is plan
+    assert len(apigraph.execution_plan(get_item, None).generations) == 3
+
+
+def test_minimal_chain_for_node_example():
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    node_key = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+
+    assert sorted(apigraph.minimal_chain_for_node(node_key, "default")) == sorted(
+        apigraph.chain_for_node(node_key, "default")
+    )
+    assert list(
+        apigraph.minimal_chain_for_node(
+            node_key, "default", [ParamKey("username", In.PATH)]
+        )
+    ) == [node_key]
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.minimal_chain_for_node(NodeKey(doc_uri, "/missing", "get"), None)
+
+
+def test_minimal_chain_for_node_with_cycle():
+    """
+    Cycles are only rejected if they are part of the minimal chain.
+    """
+    doc_uri = fixture_uri("links-with-cycle-in-chain.yaml")
+    apigraph = APIGraph(doc_uri)
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+
+    with pytest.raises(CircularDependencyError):
+        apigraph.minimal_chain_for_node(repos, None)
+    assert list(
+        apigraph.minimal_chain_for_node(repos, None, [ParamKey("username", In.PATH)])
+    ) == [repos]
+
+
+def test_parameter_sources():
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    users_v1 = NodeKey(doc_uri, "/1.0/users/{username}", "get")
+    users = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    create_user = NodeKey(doc_uri, "/2.0/users", "post")
+    invite = NodeKey(doc_uri, "/invite", "post")
+
+    assert apigraph.parameter_sources(repos) == {
+        ParamKey("username", In.PATH): (
+            ParamSource(users_v1, EdgeKey("v1", "200"), "$response.body#/username"),
+            ParamSource(users, EdgeKey("default", "200"), "$response.body#/username"),
+        )
+    }
+    # (via backlink)
+    assert apigraph.parameter_sources(create_user) == {
+        ParamKey("invite-id", In.QUERY): (
+            ParamSource(invite, EdgeKey(None, "201"), "$response.body#/id"),
         )
+    }
+    assert apigraph.parameter_sources(invite) == {}
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.parameter_sources(NodeKey(doc_uri, "/missing", "get"))
+
+
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize(
+    "chain_id,expected",
+    [
+        ("default", {"/1.0/users/{username}": ["username"]}),
+        ("v1", {"/2.0/users/{username}": ["username"]}),
+        (
+            None,
+            {
+                "/1.0/users/{username}": ["username"],
+                "/2.0/users/{username}": ["username"],
+                "/2.0/repositories/{username}": ["username"],
+                "/2.0/repositories/{username}/{slug}": ["username", "slug"],
+            },
+        ),
+    ],
+)
+def test_unsupplied_params(chain_id, traverse_anonymous, expected):
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+
+    unsupplied = apigraph.unsupplied_params(chain_id, traverse_anonymous)
+    assert {
+        node.path: [param_key.name for param_key in param_keys]
+        for node, param_keys in unsupplied.items()
+    } == expected
+    assert all(
+        param_key.location == In.PATH
+        for param_keys in unsupplied.values()
+        for param_key in param_keys
+    )
+
+    node_key = NodeKey(doc_uri, "/2.0/users", "post")
+    assert apigraph.unsupplied_params(chain_id, node_keys=[node_key]) == {}
+    with pytest.raises(nx.NetworkXError):
+        apigraph.unsupplied_params(
+            chain_id, node_keys=[NodeKey(doc_uri, "/missing", "get")]
+        )
+
+
+def test_unsupplied_params_refresh(tmp_path):
+    """
+    Parameter sources are updated when the graph is refreshed.
+    """
+    path = tmp_path / "minimal.yaml"
+    path.write_text(MINIMAL_DOC)
+    doc_uri = f"file://{path}"
+    apigraph = APIGraph(doc_uri)
+    get_item = NodeKey(doc_uri, "/orders/{orderId}/items/{itemId}", "get")
+
+    # (qualified by location)
+    assert apigraph.parameter_sources(get_item)[ParamKey("orderId", In.PATH)] == (
+        ParamSource(
+            NodeKey(doc_uri, "/orders", "post"),
+            EdgeKey(None, "201"),
+            "$response.body#/id",
+        ),
+    )
+    assert apigraph.unsupplied_params(None) == {}
+
+    path.write_text(MINIMAL_DOC.replace("itemId: $response.body#/id", "{}"))
+    assert apigraph.refresh() == {doc_uri}
+
+    assert ParamKey("itemId", In.PATH) not in apigraph.parameter_sources(get_item)
+    assert apigraph.unsupplied_params(None) == {get_item: [ParamKey("itemId", In.PATH)]}
+
+
+@pytest.mark.parametrize("traverse_anonymous", [True, False])
+@pytest.mark.parametrize("chain_id", [None, "default", "v1"])
+def test_merged_execution_plan(chain_id, traverse_anonymous):
+    """
+    The merged plan calls each operation of the targets' chains once, after
+    all the operations it depends on.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    node_keys = [
+        NodeKey(doc_uri, "/2.0/repositories/{username}", "get"),
+        NodeKey(doc_uri, "/2.0/repositories/{username}/{slug}", "get"),
+        NodeKey(doc_uri, "/2.0/users/{username}", "get"),
+    ]
+
+    plan = apigraph.merged_execution_plan(node_keys, chain_id, traverse_anonymous)
+
+    assert plan.node_keys == tuple(node_keys)
+    assert plan.chain_id == chain_id
+    called = [node for generation in plan.generations for node in generation]
+    chains = apigraph.chains_for_nodes(node_keys, chain_id, traverse_anonymous)
+    assert sorted(called) == sorted(set().union(*chains.values()))
+    order = {
+        node: i for i, generation in enumerate(plan.generations) for node in generation
+    }
+    for from_node, to_node in plan.links:
+        assert from_node == to_node or order[from_node] < order[to_node]
+    for node_key, chain in chains.items():
+        single = apigraph.execution_plan(node_key, chain_id, traverse_anonymous)
+        assert single.links.items() <= plan.links.items()
+
+
+def test_merged_execution_plan_shared():
+    """
+    Operations shared by several chains are called once, supplying each of
+    their dependents.
+    """
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    users = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    repo = NodeKey(doc_uri, "/2.0/repositories/{username}/{slug}", "get")
+
+    plan = apigraph.merged_execution_plan([repos, repo, repos], "default")
+
+    assert plan.node_keys == (repos, repo)
+    assert plan.generations[-3:] == ((users,), (repos,), (repo,))
+    called = [node for generation in plan.generations for node in generation]
+    assert len(called) == len(set(called))
+    assert len(called) < sum(
+        len(apigraph.chain_for_node(node_key, "default")) for node_key in (repos, repo)
+    )
+
+    # (targets whose own params are known need no prerequisites)
+    plan = apigraph.merged_execution_plan(
+        [repos, users], "default", satisfied=[ParamKey("username", In.PATH)]
+    )
+    assert plan.generations == ((repos, users),)
+    assert plan.links == {}
+
+    with pytest.raises(nx.NetworkXError):
+        apigraph.merged_execution_plan([NodeKey(doc_uri, "/missing", "get")], None)
+
+
+@pytest.mark.parametrize("satisfied", [None, []])
+def test_merged_execution_plan_with_cycle(satisfied):
+    doc_uri = fixture_uri("links-with-cycle-in-chain.yaml")
+    apigraph = APIGraph(doc_uri)
+    users = NodeKey(doc_uri, "/2.0/users/{username}", "get")
+    repos = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
 
-    # TODO
+    with pytest.raises(CircularDependencyError) as excinfo:
+        apigraph.merged_execution_plan([users, repos], None, satisfied=satisfied)
+    assert excinfo.value.args == (repos, None, apigraph.chain_cycles(None))
+    assert apigraph.merged_execution_plan([users], None, satisfied=satisfied)
@@ -0,0 +1,96 @@
+import networkx as nx
+import pytest
+
+from apigraph.compact import CompactGraph
+from apigraph.graph import APIGraph
+from apigraph.types import EdgeKey, NodeKey
+
+from .helpers import fixture_uri
+
+pytest.importorskip("numpy")
+
+CHAIN_IDS = [None, "default", "v1"]
+
+
+def _random_graph(seed: int) -> nx.MultiDiGraph:
+    """
+    Random multigraph (with cycles) having `APIGraph`-like nodes and edges
+    """
+    digraph = nx.gnp_random_graph(40, 0.05, seed=seed, directed=True)
+    graph = nx.MultiDiGraph()
+    for node in digraph:
+        graph.add_node(NodeKey("file:///doc.yaml", f"/{node}", "get"))
+    for i, (u, v) in enumerate(digraph.edges):
+        for chain_id in CHAIN_IDS[: i % len(CHAIN_IDS) + 1]:
+            key = EdgeKey(chain_id, "200")
+            graph.add_edge(
+                NodeKey("file:///doc.yaml", f"/{u}", "get"),
+                NodeKey("file:///doc.yaml", f"/{v}", "get"),
+                key=key,
+                detail=f"{u}->{v} {chain_id}",
+            )
+    return graph
+
+
+def _chain_view(graph, chain_ids):
+    if chain_ids is None:
+        return graph
+    return nx.subgraph_view(
+        graph, filter_edge=lambda _u, _v, key: key.chain_id in chain_ids
+    )
+
+
+@pytest.mark.parametrize("chain_ids", [None, {None}, {"default"}, {"v1", None}])
+@pytest.mark.parametrize("seed", range(3))
+def test_compact_graph(seed, chain_ids):
+    """
+    Queries over the compact graph give the same results as networkx.
+    """
+    graph = _random_graph(seed)
+    compact = CompactGraph(graph)
+    view = _chain_view(graph, chain_ids)
+
+    for node in graph:
+        assert sorted(compact.ancestors(node, chain_ids)) == sorted(
+            nx.ancestors(view, node)
+        )
+        assert sorted(compact.descendants(node, chain_ids)) == sorted(
+            nx.descendants(view, node)
+        )
+        assert set(compact.in_edges(node, chain_ids)) == set(
+            (from_node, key, detail)
+            for from_node, _, key, detail in view.in_edges(
+                node, keys=True, data="detail"
+            )
+        )
+
+    # (the ancestors of some node, often acyclic)
+    for node in graph:
+        node_keys = nx.ancestors(view, node) | {node}
+        subgraph = view.subgraph(node_keys)
+        if nx.is_directed_acyclic_graph(subgraph):
+            generations = compact.topological_generations(chain_ids, node_keys)
+            assert [sorted(gen) for gen in generations] == [
+                sorted(gen) for gen in nx.topological_generations(subgraph)
+            ]
+        else:
+            with pytest.raises(nx.NetworkXUnfeasible):
+                compact.topological_sort(chain_ids, node_keys)
+
+
+def test_apigraph_compact():
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(doc_uri)
+    compact = apigraph.compact()
+    assert apigraph.compact() is compact
+    assert compact.nbytes > 0
+
+    node_key = NodeKey(doc_uri, "/2.0/repositories/{username}", "get")
+    chain = apigraph.chain_for_node(node_key, "default")
+    assert sorted(compact.ancestors(node_key, {"default", None})) == sorted(
+        set(chain) - {node_key}
+    )
+    assert compact.topological_sort({"default", None}, chain)[-1] == node_key
+
+    with pytest.raises(nx.NetworkXError):
+        compact.ancestors(NodeKey(doc_uri, "/missing", "get"))
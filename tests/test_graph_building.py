@@ -1,7 +1,14 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import inject
+import networkx as nx
 import pytest
 from openapi_orm.models import In, Parameter, RequestBody
 from pydantic import ValidationError
 
+import apigraph.graph as apigraph_graph
 from apigraph.graph import APIGraph, DuplicateOperationId, InvalidSecuritySchemeError
 from apigraph.types import (
     HttpMethod,
@@ -66,7 +73,8 @@ def test_links(fixture, chain_id):
     ] == expected_edges
 
 
-def test_cross_doc_links(httpx_mock):
+@pytest.mark.parametrize("async_crawl", [False, True])
+def test_cross_doc_links(httpx_mock, async_crawl):
     """
     NOTE: cross-doc-links.yaml links via `operationRef` URI to links.yaml
     So between this and `test_links` both `operationRef` and `operationId`
@@ -80,7 +88,7 @@ def test_cross_doc_links(httpx_mock):
     )
     httpx_mock.add_response(url=doc_uri, data=raw_doc)
 
-    apigraph = APIGraph(doc_uri)
+    apigraph = APIGraph(doc_uri, async_crawl=async_crawl)
     assert apigraph.docs.keys() == {doc_uri, other_doc_uri}
 
     expected_nodes = [
@@ -359,7 +367,8 @@ def test_backlinks(fixture, chain_id):
     ] == expected_edges
 
 
-def test_cross_doc_backlinks(httpx_mock):
+@pytest.mark.parametrize("async_crawl", [False, True])
+def test_cross_doc_backlinks(httpx_mock, async_crawl):
     """
     NOTE: cross-doc-links.yaml links via `operationRef` URI to links.yaml
     So between this and `test_links` both `operationRef` and `operationId`
@@ -373,7 +382,7 @@ def test_cross_doc_backlinks(httpx_mock):
     )
     httpx_mock.add_response(url=doc_uri, data=raw_doc)
 
-    apigraph = APIGraph(doc_uri)
+    apigraph = APIGraph(doc_uri, async_crawl=async_crawl)
     assert apigraph.docs.keys() == {doc_uri, other_doc_uri}
 
     # (sorted)
@@ -906,3 +915,421 @@ def test_parameter_merging():
         ),
     ]
     assert sorted([node for node in apigraph.graph.nodes(data=True)]) == expected_nodes
+
+
+@inject.params(settings="settings")
+def test_graph_snapshot(tmp_path, monkeypatch, settings=None):
+    """
+    With snapshots enabled an unchanged graph is restored without crawling,
+    while a change to any source doc triggers a rebuild.
+    """
+    monkeypatch.setattr(settings, "GRAPH_SNAPSHOTS", True)
+    monkeypatch.setattr(settings, "CACHE_EXPIRE", 0)  # always re-read the file
+    path = tmp_path / "dependencies.yaml"
+    path.write_text(Path("tests/fixtures/dependencies.yaml").read_text())
+    doc_uri = f"file://{path}"
+
+    built = APIGraph(doc_uri)
+
+    def _fail_build(self, start_uri):
+        raise AssertionError("graph should have been restored from snapshot")
+
+    with monkeypatch.context() as m:
+        m.setattr(APIGraph, "_build", _fail_build)
+        restored = APIGraph(doc_uri)
+
+    assert list(restored.graph.nodes(data=True)) == list(built.graph.nodes(data=True))
+    assert list(restored.graph.edges(keys=True, data=True)) == list(
+        built.graph.edges(keys=True, data=True)
+    )
+    assert restored.docs.keys() == {doc_uri}
+    assert restored.docs[doc_uri] == built.docs[doc_uri]
+
+    path.write_text(
+        path.read_text().replace("operationId: createUser\n", "operationId: addUser\n")
+    )
+    rebuilt = APIGraph(doc_uri)
+    assert rebuilt._indexes[doc_uri]["addUser"] == ("/2.0/users", HttpMethod.POST)
+
+
+@inject.params(settings="settings")
+def test_graph_snapshot_load_options(monkeypatch, settings=None):
+    """
+    A snapshot is only restored for a graph built with the same load options,
+    i.e. a trusted build does not skip validation of a later validated one.
+    """
+    monkeypatch.setattr(settings, "GRAPH_SNAPSHOTS", True)
+    doc_uri = fixture_uri("invalid-parameter.yaml")
+
+    APIGraph(doc_uri, trusted=True)
+    APIGraph(doc_uri, trusted=True)  # (restored)
+
+    with pytest.raises(ValidationError):
+        APIGraph(doc_uri)
+
+
+@pytest.mark.parametrize(
+    "fixture",
+    ["dependencies.yaml", "security.yaml", "parameters.yaml", "backlinks.yaml"],
+)
+def test_lazy_validation(fixture):
+    """
+    Graph built with lazily validated docs is identical to the eager one
+    """
+    doc_uri = fixture_uri(fixture)
+
+    eager = APIGraph(doc_uri)
+    lazy = APIGraph(doc_uri, lazy=True)
+
+    assert list(lazy.graph.nodes(data=True)) == list(eager.graph.nodes(data=True))
+    assert list(lazy.graph.edges(keys=True, data=True)) == list(
+        eager.graph.edges(keys=True, data=True)
+    )
+
+
+@pytest.mark.parametrize(
+    "fixture",
+    [
+        "dependencies.yaml",
+        "security.yaml",
+        "parameters.yaml",
+        "backlinks.yaml",
+        "backlinks-request-body-params.yaml",
+        "links-with-multiple-chain-id.yaml",
+        "links-unquoted-status.yaml",
+    ],
+)
+def test_trusted(fixture):
+    """
+    Graph built from trusted (unvalidated) docs is identical to the validated one
+    """
+    doc_uri = fixture_uri(fixture)
+
+    validated = APIGraph(doc_uri)
+    trusted = APIGraph(doc_uri, trusted=True)
+
+    assert trusted.docs[doc_uri] == validated.docs[doc_uri]
+    assert list(trusted.graph.nodes(data=True)) == list(
+        validated.graph.nodes(data=True)
+    )
+    assert list(trusted.graph.edges(keys=True, data=True)) == list(
+        validated.graph.edges(keys=True, data=True)
+    )
+
+
+def _graph_data(graph):
+    return (
+        dict(graph.nodes(data=True)),
+        {(u, v, key): data for u, v, key, data in graph.edges(keys=True, data=True)},
+    )
+
+
+@pytest.mark.parametrize("detect_changes", [False, True])
+def test_refresh(cross_doc_links, detect_changes):
+    """
+    Refreshing after a doc has changed gives the same graph as a full rebuild,
+    without reloading the unchanged docs.
+    """
+    doc_path, links_path = cross_doc_links
+    doc_uri = f"file://{doc_path}"
+    links_uri = f"file://{links_path}"
+
+    apigraph = APIGraph(doc_uri)
+    graph = apigraph.graph
+    doc = apigraph.docs[doc_uri]
+    apigraph.chain_for_node(
+        NodeKey(links_uri, "/2.0/repositories/{username}", HttpMethod.GET), "default"
+    )
+    chain_index = apigraph._chains
+
+    assert apigraph.refresh() == set()
+    assert apigraph.graph is graph
+
+    links_path.write_text(
+        links_path.read_text().replace("getRepositoriesByOwner", "getReposByOwner")
+    )
+    reloaded = apigraph.refresh() if detect_changes else apigraph.refresh(links_uri)
+
+    assert reloaded == {links_uri}
+    assert apigraph.docs[doc_uri] is doc
+    assert nx.is_frozen(apigraph.graph)
+    assert apigraph._chains is not chain_index
+    assert apigraph.chain_cache_info().currsize == 0
+    assert apigraph._indexes[links_uri]["getReposByOwner"] == (
+        "/2.0/repositories/{username}",
+        HttpMethod.GET,
+    )
+    # (unchanged graph is not affected)
+    assert graph is not apigraph.graph
+    assert "getReposByOwner" not in str(graph.edges(data=True))
+    assert _graph_data(apigraph.graph) == _graph_data(APIGraph(doc_uri).graph)
+
+
+def test_refreshed_unaffected(cross_doc_links):
+    """
+    The graph a refreshed copy is made from keeps its own resolved refs.
+    """
+    doc_path, links_path = cross_doc_links
+    links_uri = f"file://{links_path}"
+
+    apigraph = APIGraph(f"file://{doc_path}")
+    ref_table = apigraph._load_options["ref_table"]
+    resolved = dict(ref_table.docs)
+    assert resolved
+
+    links_path.write_text(
+        links_path.read_text().replace("getRepositoriesByOwner", "getReposByOwner")
+    )
+    updated, reloaded = apigraph.refreshed(links_uri)
+
+    assert reloaded == {links_uri}
+    assert apigraph._load_options["ref_table"] is ref_table
+    assert ref_table.docs == resolved
+    assert updated._load_options["ref_table"] is not ref_table
+    assert updated.docs._load_options["ref_table"] is not ref_table
+
+
+def test_refresh_removed_link(cross_doc_links):
+    """
+    Docs which are no longer linked to are dropped from the graph on refresh.
+    """
+    doc_path, links_path = cross_doc_links
+    doc_uri = f"file://{doc_path}"
+    links_uri = f"file://{links_path}"
+
+    apigraph = APIGraph(doc_uri)
+    assert apigraph.docs.keys() == {doc_uri, links_uri}
+
+    content = doc_path.read_text()
+    doc_path.write_text(content[: content.index("          links:")])
+
+    assert apigraph.refresh() == {doc_uri}
+    assert apigraph.docs.keys() == {doc_uri}
+    assert not any(node.doc_uri == links_uri for node in apigraph.graph)
+    assert _graph_data(apigraph.graph) == _graph_data(APIGraph(doc_uri).graph)
+
+
+@pytest.mark.parametrize("async_crawl", [False, True])
+def test_multiple_start_uris(cross_doc_links, monkeypatch, async_crawl):
+    """
+    Docs reachable from several start docs are crawled once, into one graph.
+    """
+    doc_path, links_path = cross_doc_links
+    doc_uri = f"file://{doc_path}"
+    links_uri = f"file://{links_path}"
+    other_uri = fixture_uri("dependencies.yaml")
+
+    separate = [APIGraph(uri).graph for uri in (doc_uri, other_uri)]
+
+    loaded = []
+    for name in ("load_doc", "load_doc_async"):
+        load = getattr(apigraph_graph, name)
+        monkeypatch.setattr(
+            apigraph_graph,
+            name,
+            lambda uri, *args, _load=load, **kwargs: loaded.append(uri)
+            or _load(uri, *args, **kwargs),
+        )
+
+    apigraph = APIGraph(links_uri, doc_uri, other_uri, async_crawl=async_crawl)
+
+    assert apigraph.start_uris == (links_uri, doc_uri, other_uri)
+    assert apigraph.docs.keys() == {doc_uri, links_uri, other_uri}
+    assert sorted(loaded) == sorted(apigraph.docs.keys())
+    assert _graph_data(apigraph.graph) == _graph_data(nx.compose_all(separate))
+
+
+def test_no_start_uris():
+    with pytest.raises(TypeError):
+        APIGraph()
+
+
+def test_start_uri_keyword():
+    doc_uri = fixture_uri("dependencies.yaml")
+    apigraph = APIGraph(start_uri=doc_uri)
+    assert apigraph.start_uris == (doc_uri,)
+    assert apigraph.start_uri == doc_uri
+
+
+CHAIN_DOC = """
+openapi: 3.0.0
+info:
+  title: Chain {index}
+  version: 1.0.0
+paths:
+  /items:
+    get:
+      operationId: getItems
+      responses:
+        '200':
+          description: ok
+          links:
+            next:
+              operationRef: {next_uri}#/paths/~1items/get
+"""
+
+CHAIN_END_DOC = """
+openapi: 3.0.0
+info:
+  title: Chain End
+  version: 1.0.0
+paths:
+  /items:
+    get:
+      operationId: getItems
+      responses:
+        '200':
+          description: ok
+"""
+
+
+def _doc_chain(tmp_path, length):
+    uris = [f"file://{tmp_path}/chain-{index}.yaml" for index in range(length)]
+    for index, uri in enumerate(uris[:-1]):
+        Path(uri[len("file://") :]).write_text(
+            CHAIN_DOC.format(index=index, next_uri=uris[index + 1])
+        )
+    Path(uris[-1][len("file://") :]).write_text(CHAIN_END_DOC)
+    return uris
+
+
+def test_crawl_deep_chain(tmp_path, monkeypatch):
+    """
+    Crawling is iterative, so a chain of linked docs longer than the
+    recursion limit can be crawled, and each doc is loaded only once.
+    """
+    uris = _doc_chain(tmp_path, 300)
+
+    loaded = []
+    load_doc = apigraph_graph.load_doc
+    monkeypatch.setattr(
+        apigraph_graph,
+        "load_doc",
+        lambda uri, *args, **kwargs: loaded.append(uri)
+        or load_doc(uri, *args, **kwargs),
+    )
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(250)
+    try:
+        apigraph = APIGraph(uris[0], uris[10], trusted=True)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert apigraph.docs.keys() == set(uris)
+    assert sorted(loaded) == sorted(uris)
+    assert len(apigraph.graph.edges) == len(uris) - 1
+    assert apigraph.crawl_stats.keys() == set(uris)
+    assert [apigraph.crawl_stats[uri].depth for uri in uris[:12]] == (
+        list(range(10)) + [0, 1]
+    )
+    assert not apigraph.uncrawled_uris
+
+
+FORK_DOC = """
+openapi: 3.0.0
+info:
+  title: Fork
+  version: 1.0.0
+paths:
+  /items:
+    get:
+      operationId: getItems
+      responses:
+        '200':
+          description: ok
+          links:
+            left:
+              operationRef: {left_uri}#/paths/~1items/get
+            right:
+              operationRef: {right_uri}#/paths/~1items/get
+"""
+
+
+@inject.params(settings="settings")
+def test_crawl_async_depth(tmp_path, monkeypatch, settings=None):
+    """
+    A doc found by the async crawl at a smaller depth than it was first
+    crawled at is moved up, along with the docs it links to.
+    """
+    # start -> slow -> shared -> end, and start -> left -> middle -> shared
+    uris = {
+        name: f"file://{tmp_path}/{name}.yaml"
+        for name in ("start", "left", "middle", "slow", "shared", "end")
+    }
+    docs = {
+        "start": FORK_DOC.format(left_uri=uris["left"], right_uri=uris["slow"]),
+        "left": CHAIN_DOC.format(index="left", next_uri=uris["middle"]),
+        "middle": CHAIN_DOC.format(index="middle", next_uri=uris["shared"]),
+        "slow": CHAIN_DOC.format(index="slow", next_uri=uris["shared"]),
+        "shared": CHAIN_DOC.format(index="shared", next_uri=uris["end"]),
+        "end": CHAIN_END_DOC,
+    }
+    for name, doc in docs.items():
+        (tmp_path / f"{name}.yaml").write_text(doc)
+    monkeypatch.setattr(settings, "CRAWL_MAX_DEPTH", 3)
+
+    load_doc_async = apigraph_graph.load_doc_async
+
+    async def _load_doc_async(uri, *args, **kwargs):
+        if uri == uris["slow"]:
+            await asyncio.sleep(0.5)
+        return await load_doc_async(uri, *args, **kwargs)
+
+    monkeypatch.setattr(apigraph_graph, "load_doc_async", _load_doc_async)
+
+    apigraph = APIGraph(uris["start"], async_crawl=True)
+
+    assert apigraph.docs.keys() == set(uris.values())
+    assert apigraph.crawl_stats[uris["shared"]].depth == 2
+    assert apigraph.crawl_stats[uris["end"]].depth == 3
+    assert not apigraph.uncrawled_uris
+
+
+@pytest.mark.parametrize(
+    "setting,value,crawled", [("CRAWL_MAX_DEPTH", 2, 3), ("CRAWL_MAX_DOCUMENTS", 4, 4)],
+)
+@pytest.mark.parametrize("async_crawl", [False, True])
+@inject.params(settings="settings")
+def test_crawl_budget(
+    tmp_path, monkeypatch, setting, value, crawled, async_crawl, settings=None
+):
+    """
+    Docs beyond the crawl budget are not crawled, but are recorded.
+    """
+    uris = _doc_chain(tmp_path, 6)
+    monkeypatch.setattr(settings, setting, value)
+
+    apigraph = APIGraph(uris[0], async_crawl=async_crawl)
+
+    assert apigraph.docs.keys() == set(uris[:crawled])
+    assert apigraph.uncrawled_uris == {uris[crawled]}
+    assert max(stats.depth for stats in apigraph.crawl_stats.values()) == crawled - 1
+
+
+@inject.params(settings="settings")
+def test_crawl_budget_snapshot(tmp_path, monkeypatch, settings=None):
+    """
+    A restored snapshot keeps the crawl state, and is only restored within
+    the same crawl budget.
+    """
+    uris = _doc_chain(tmp_path, 6)
+    monkeypatch.setattr(settings, "GRAPH_SNAPSHOTS", True)
+    monkeypatch.setattr(settings, "CRAWL_MAX_DEPTH", 2)
+
+    built = APIGraph(uris[0])
+
+    def _fail_build(self, *start_uris):
+        raise AssertionError("graph should have been restored from snapshot")
+
+    with monkeypatch.context() as m:
+        m.setattr(APIGraph, "_build", _fail_build)
+        restored = APIGraph(uris[0])
+
+    assert restored.crawl_stats == built.crawl_stats
+    assert restored.uncrawled_uris == built.uncrawled_uris == {uris[3]}
+
+    monkeypatch.setattr(settings, "CRAWL_MAX_DEPTH", 3)
+    rebuilt = APIGraph(uris[0])
+    assert rebuilt.docs.keys() == set(uris[:4])
+    assert rebuilt.uncrawled_uris == {uris[4]}
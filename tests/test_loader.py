@@ -0,0 +1,407 @@
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import inject
+import pytest
+import yaml
+from openapi_orm.loader import DocFormat, JSONOrYAMLRefLoader, sniff_format
+from openapi_orm.models import OpenAPI3Document
+from openapi_orm.parallel import parse_parallel
+from pydantic import ValidationError
+
+from apigraph.graph import APIGraph
+from apigraph.loader import (
+    RefTable,
+    _shutdown_validation_pools,
+    _validation_pool,
+    load_doc,
+)
+
+from .helpers import fixture_uri, str_doc_with_substitutions
+
+
+@inject.params(loader="jsonref_loader")
+def test_pooled_client_reused_and_closed(httpx_mock, loader=None):
+    """
+    All remote docs should be fetched via the loader's single pooled client,
+    which is released when the APIGraph is closed.
+    """
+    doc_uri = "https://fakeurl/cross-doc-links.yaml"
+    other_doc_uri = fixture_uri("links.yaml")
+
+    raw_doc = str_doc_with_substitutions(
+        "tests/fixtures/cross-doc-links.yaml", {"fixture_uri": other_doc_uri},
+    )
+    httpx_mock.add_response(url=doc_uri, data=raw_doc)
+
+    with APIGraph(doc_uri) as apigraph:
+        assert apigraph.docs.keys() == {doc_uri, other_doc_uri}
+        client = loader._client
+        assert client is not None
+        assert loader.client is client
+
+    assert loader._client is None
+    # loader remains usable after close
+    assert loader.client is not client
+    loader.close()
+
+
+@inject.params(loader="jsonref_loader", settings="settings")
+def test_cache_revalidation_not_modified(
+    httpx_mock, monkeypatch, loader=None, settings=None
+):
+    """
+    A stale cache entry having an ETag is revalidated with a conditional
+    request and a 304 response re-uses the cached doc without re-parsing.
+    """
+    doc_uri = "https://fakeurl/links.yaml"
+    with open("tests/fixtures/links.yaml") as f:
+        raw_doc = f.read()
+
+    httpx_mock.add_response(
+        url=doc_uri, data=raw_doc, headers={"ETag": '"v1"'},
+    )
+    httpx_mock.add_response(
+        url=doc_uri, status_code=304, match_headers={"If-None-Match": '"v1"'},
+    )
+
+    monkeypatch.setattr(settings, "CACHE_EXPIRE", 0)
+    doc = loader(doc_uri)
+    assert doc["info"]["title"]
+
+    def _fail_parse(data):
+        raise AssertionError("304 response should not be parsed")
+
+    monkeypatch.setattr(loader, "parse", _fail_parse)
+    assert loader(doc_uri) == doc
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@inject.params(loader="jsonref_loader", settings="settings")
+def test_cache_revalidation_modified(
+    httpx_mock, monkeypatch, loader=None, settings=None
+):
+    """
+    A stale cache entry whose validator no longer matches is replaced by
+    the newly fetched doc.
+    """
+    doc_uri = "https://fakeurl/doc.json"
+
+    httpx_mock.add_response(
+        url=doc_uri,
+        json={"version": 1},
+        headers={"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"},
+    )
+    httpx_mock.add_response(
+        url=doc_uri,
+        json={"version": 2},
+        match_headers={"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"},
+    )
+
+    monkeypatch.setattr(settings, "CACHE_EXPIRE", 0)
+    assert loader(doc_uri) == {"version": 1}
+    assert loader(doc_uri) == {"version": 2}
+
+
+def test_model_cache_warm_start(monkeypatch):
+    """
+    Second load of an unchanged doc should return the cached model without
+    re-validating it.
+    """
+    doc_uri = fixture_uri("parameters.yaml")
+    doc = load_doc(doc_uri)
+
+    def _fail_parse_obj(obj):
+        raise AssertionError("cached model should not be re-validated")
+
+    monkeypatch.setattr(OpenAPI3Document, "parse_obj", _fail_parse_obj)
+    assert load_doc(doc_uri) == doc
+
+
+COMMON_DOC = """
+openapi: 3.0.0
+info:
+  title: Common
+  version: 1.0.0
+paths: {{}}
+components:
+  parameters:
+    username:
+      name: {name}
+      in: path
+      required: true
+      schema:
+        type: string
+"""
+
+ROOT_DOC = """
+openapi: 3.0.0
+info:
+  title: Root
+  version: 1.0.0
+paths:
+  /users/{username}:
+    get:
+      parameters:
+        - $ref: https://fakeurl/common.yaml#/components/parameters/username
+      responses:
+        '200':
+          description: ok
+"""
+
+
+@inject.params(loader="jsonref_loader")
+def test_model_cache_invalidated_by_ref_dependency(httpx_mock, loader=None):
+    """
+    The cached model must be discarded when a doc it pulled in via `$ref`
+    has changed, even if the doc itself has not.
+    """
+    doc_uri = "https://fakeurl/root.yaml"
+    common_uri = "https://fakeurl/common.yaml"
+    httpx_mock.add_response(url=doc_uri, data=ROOT_DOC)
+    httpx_mock.add_response(url=common_uri, data=COMMON_DOC.format(name="username"))
+
+    doc = load_doc(doc_uri)
+    (param,) = doc.paths["/users/{username}"].get.parameters
+    assert param.name == "username"
+
+    # common doc changes upstream
+    loader.store.delete(common_uri)
+    httpx_mock.add_response(url=common_uri, data=COMMON_DOC.format(name="user"))
+
+    doc = load_doc(doc_uri)
+    (param,) = doc.paths["/users/{username}"].get.parameters
+    assert param.name == "user"
+
+
+@pytest.mark.parametrize(
+    "data,content_type,uri,expected",
+    [
+        ('{"a": 1}', None, None, DocFormat.JSON),
+        (b"\n  [1, 2]", None, None, DocFormat.JSON),
+        ("a: 1", None, None, DocFormat.YAML),
+        ("a: 1", None, "file:///specs/api.yml", DocFormat.YAML),
+        ("a: 1", None, "https://host/api.json?v=1", DocFormat.JSON),
+        ("a: 1", "application/vnd.oai.openapi+json", "api.yaml", DocFormat.JSON),
+        ("{a: 1}", "application/x-yaml; charset=utf-8", None, DocFormat.YAML),
+        ("a: 1", "text/plain", "api.yaml", DocFormat.YAML),
+    ],
+)
+def test_sniff_format(data, content_type, uri, expected):
+    assert sniff_format(data, content_type, uri) is expected
+
+
+@pytest.mark.parametrize(
+    "data,uri",
+    [
+        ('{"a": [1, 2]}', None),
+        ("a: [1, 2]", None),
+        ("{a: [1, 2]}", None),  # YAML flow mapping, looks like JSON
+        ('{"a": [1, 2]}', "api.yaml"),  # JSON is valid YAML
+    ],
+)
+def test_parse(data, uri):
+    assert JSONOrYAMLRefLoader.parse(data, uri=uri) == {"a": [1, 2]}
+
+
+INVALID_SCHEMA_DOC = """
+openapi: 3.0.0
+info:
+  title: Invalid Schema
+  version: 1.0.0
+paths:
+  /users:
+    get:
+      responses:
+        '200':
+          description: ok
+          content:
+            application/json:
+              schema:
+                type: object
+                required: []
+"""
+
+
+def test_lazy_validation_deferred(tmp_path):
+    """
+    With `lazy=True` an invalid schema does not prevent loading the doc,
+    the error is raised only when the schema is accessed.
+    """
+    path = tmp_path / "invalid-schema.yaml"
+    path.write_text(INVALID_SCHEMA_DOC)
+
+    with pytest.raises(ValidationError):
+        load_doc(path)
+
+    doc = load_doc(path, lazy=True)
+    response = doc.paths["/users"].get.responses["200"]
+    schema = response.content["application/json"].schema_
+    with pytest.raises(ValidationError):
+        schema.required
+
+
+def test_trusted_skips_validation(tmp_path):
+    """
+    With `trusted=True` an invalid doc is loaded as-is, with aliased fields
+    and extensions still populated.
+    """
+    path = tmp_path / "invalid-schema.yaml"
+    path.write_text(INVALID_SCHEMA_DOC)
+
+    doc = load_doc(path, trusted=True)
+    response = doc.paths["/users"].get.responses["200"]
+    schema = response.content["application/json"].schema_
+    assert schema.type_ == "object"
+    assert schema.required == []
+
+
+@pytest.mark.parametrize(
+    "fixture", ["dependencies.yaml", "security.yaml", "backlinks-components-ref.yaml"]
+)
+@inject.params(settings="settings")
+def test_parallel_validation(monkeypatch, fixture, settings=None):
+    """
+    Doc validated in chunks by a process pool is identical to the serially
+    validated one.
+    """
+    doc_uri = fixture_uri(fixture)
+    monkeypatch.setattr(settings, "MODEL_CACHE", False)
+    serial = load_doc(doc_uri)
+
+    monkeypatch.setattr(settings, "VALIDATION_WORKERS", 2)
+    monkeypatch.setattr(settings, "VALIDATION_CHUNK_SIZE", 1)
+
+    parse_obj = OpenAPI3Document.parse_obj
+
+    def _parse_shell(obj):
+        assert not obj["paths"], "paths should be validated by the workers"
+        return parse_obj(obj)
+
+    monkeypatch.setattr(OpenAPI3Document, "parse_obj", _parse_shell)
+    parallel = load_doc(doc_uri)
+
+    assert parallel == serial
+    assert parallel.__fields_set__ == serial.__fields_set__
+    if serial.components:
+        assert parallel.components.__fields_set__ == serial.components.__fields_set__
+
+
+@inject.params(settings="settings")
+def test_parallel_validation_error(monkeypatch, settings=None):
+    """
+    Validation errors from a parallel load are the same as for a serial one.
+    """
+    doc_uri = fixture_uri("invalid-backlink-no-operation-identifier.yaml")
+    with pytest.raises(ValidationError) as serial:
+        load_doc(doc_uri)
+
+    monkeypatch.setattr(settings, "VALIDATION_WORKERS", 2)
+    monkeypatch.setattr(settings, "VALIDATION_CHUNK_SIZE", 1)
+
+    parse_obj = OpenAPI3Document.parse_obj
+
+    def _parse_shell(obj):
+        assert not obj["paths"], "doc should not be re-validated serially"
+        return parse_obj(obj)
+
+    monkeypatch.setattr(OpenAPI3Document, "parse_obj", _parse_shell)
+    with pytest.raises(ValidationError) as parallel:
+        load_doc(doc_uri)
+
+    assert parallel.value.errors() == serial.value.errors()
+
+
+class _BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def test_parallel_validation_broken_pool():
+    """
+    If the pool fails then the doc is validated serially, with a warning.
+    """
+    raw_doc = yaml.safe_load(Path("tests/fixtures/dependencies.yaml").read_text())
+
+    with pytest.warns(RuntimeWarning, match="worker died"):
+        doc = parse_parallel(raw_doc, _BrokenExecutor(), 1)
+
+    assert doc == OpenAPI3Document.parse_obj(raw_doc)
+
+
+def test_validation_pool():
+    """
+    One pool is started per number of workers, however many threads ask for
+    it at once, and shutting down the pools (at exit) lets a new one start.
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pools = set(executor.map(lambda _: _validation_pool(2), range(8)))
+    assert len(pools) == 1
+
+    _shutdown_validation_pools()
+    assert _validation_pool(2) not in pools
+    _shutdown_validation_pools()
+
+
+SHARED_REF_DOC = """
+openapi: 3.0.0
+info:
+  title: {title}
+  version: 1.0.0
+paths:
+  /users/{{username}}:
+    get:
+      parameters:
+        - $ref: {common_uri}#/components/parameters/username
+      responses:
+        '200':
+          description: ok
+  /users/{{username}}/repos:
+    get:
+      parameters:
+        - $ref: {common_uri}#/components/parameters/username
+      responses:
+        '200':
+          description: ok
+"""
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_shared_refs(tmp_path, trusted):
+    """
+    Docs loaded with the same `RefTable` share a single model instance for
+    each `$ref` target, and still record the docs they depend on.
+    """
+    common_path = tmp_path / "common.yaml"
+    common_path.write_text(COMMON_DOC.format(name="username"))
+    common_uri = f"file://{common_path}"
+    doc_paths = []
+    for title in ("One", "Two"):
+        path = tmp_path / f"{title.lower()}.yaml"
+        path.write_text(SHARED_REF_DOC.format(title=title, common_uri=common_uri))
+        doc_paths.append(path)
+
+    def _params(doc):
+        return [
+            param
+            for path_item in doc.paths.values()
+            for param in path_item.get.parameters
+        ]
+
+    ref_table = RefTable()
+    dependencies = [set(), set()]
+    one, two = (
+        load_doc(path, trusted=trusted, dependencies=deps, ref_table=ref_table)
+        for path, deps in zip(doc_paths, dependencies)
+    )
+    (param, *others) = _params(one) + _params(two)
+    assert param.name == "username"
+    assert all(other is param for other in others)
+    assert all(common_uri in deps for deps in dependencies)
+
+    # not shared without a ref table
+    one, two = (load_doc(path, trusted=trusted) for path in doc_paths)
+    assert _params(one)[0] is not _params(two)[0]
@@ -0,0 +1,107 @@
+import threading
+
+import inject
+import pytest
+
+from apigraph.graph import APIGraph
+from apigraph.types import HttpMethod
+from apigraph.watch import GraphWatcher
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = inject.instance("settings")
+    monkeypatch.setattr(settings, "WATCH_DEBOUNCE", 0)
+    monkeypatch.setattr(settings, "WATCH_INTERVAL", 0.01)
+    return settings
+
+
+def _rename_operation(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+
+
+def test_poll(cross_doc_links, settings):
+    """
+    A changed file is reloaded and the updated graph swapped in, leaving the
+    previous graph intact.
+    """
+    doc_path, links_path = cross_doc_links
+    doc_uri = f"file://{doc_path}"
+    links_uri = f"file://{links_path}"
+
+    apigraph = APIGraph(doc_uri)
+    watcher = GraphWatcher(apigraph)
+    assert watcher.poll() == set()
+    assert watcher.apigraph is apigraph
+
+    _rename_operation(links_path, "getRepositoriesByOwner", "getReposByOwner")
+    assert watcher.poll() == {links_uri}
+    assert watcher.apigraph is not apigraph
+    assert "getReposByOwner" in watcher.apigraph._indexes[links_uri]
+    assert "getReposByOwner" not in apigraph._indexes[links_uri]
+    assert watcher.poll() == set()
+
+
+def test_poll_debounce(cross_doc_links, settings, monkeypatch):
+    """
+    Refresh waits until edits have settled.
+    """
+    doc_path, links_path = cross_doc_links
+    links_uri = f"file://{links_path}"
+
+    watcher = GraphWatcher(APIGraph(f"file://{doc_path}"))
+    monkeypatch.setattr(settings, "WATCH_DEBOUNCE", 60)
+    _rename_operation(links_path, "getRepositoriesByOwner", "getReposByOwner")
+    assert watcher.poll() == set()
+    _rename_operation(links_path, "getUserByName", "getUser")
+    assert watcher.poll() == set()
+
+    monkeypatch.setattr(settings, "WATCH_DEBOUNCE", 0)
+    assert watcher.poll() == {links_uri}
+    assert watcher.apigraph._indexes[links_uri].keys() == {
+        "getUser",
+        "getReposByOwner",
+    }
+
+
+def test_poll_error(cross_doc_links, settings):
+    """
+    If a refresh fails the previous graph is kept, until the file is fixed.
+    """
+    doc_path, links_path = cross_doc_links
+    links_uri = f"file://{links_path}"
+    errors = []
+
+    apigraph = APIGraph(f"file://{doc_path}")
+    watcher = GraphWatcher(apigraph, on_error=errors.append)
+    content = links_path.read_text()
+
+    links_path.write_text(content.replace("in: path", "in: nowhere"))
+    assert watcher.poll() == set()
+    assert watcher.apigraph is apigraph
+    assert watcher.last_error is errors[0]
+
+    links_path.write_text(content.replace("getUserByName", "getUser"))
+    assert watcher.poll() == {links_uri}
+    assert watcher.last_error is None
+    assert watcher.apigraph._indexes[links_uri]["getUser"] == (
+        "/2.0/users/{username}",
+        HttpMethod.GET,
+    )
+
+
+def test_watch_thread(cross_doc_links, settings):
+    doc_path, links_path = cross_doc_links
+    links_uri = f"file://{links_path}"
+    refreshed = threading.Event()
+    calls = []
+
+    def on_refresh(apigraph, reloaded):
+        calls.append(reloaded)
+        refreshed.set()
+
+    with GraphWatcher(APIGraph(f"file://{doc_path}"), on_refresh=on_refresh):
+        _rename_operation(links_path, "getRepositoriesByOwner", "getReposByOwner")
+        assert refreshed.wait(timeout=5)
+
+    assert calls == [{links_uri}]